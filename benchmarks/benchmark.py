@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+# Benchmarks import the script directly from the source directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import how_long_to_beat as hltb
+from mock_server import MockServices, start_mock_server
+
+# Number of IDs looked up by the id benchmark commands
+BENCH_ID_COUNT = 50
+
+# Build command-line arguments for benchmark command against mock services
+def get_command_argv(command: str, services: MockServices, process_count: int = 0) -> list:
+    credentials = ['--key', 'benchmark', '--user', 'benchmark', '--format', 'ndjson']
+    hltb_ids = list(services.hltb_entries)[:BENCH_ID_COUNT]
+    app_ids = [str(game['appid']) for game in services.games[:BENCH_ID_COUNT]]
+
+    if command == 'backlog':
+        return ['backlog'] + credentials
+    if command == 'recent':
+        return ['recent'] + credentials
+    if command == 'search':
+        return ['search', services.hltb_entries[hltb_ids[0]]['game_name']] + credentials
+    if command == 'id':
+        return ['id', '--processes', str(process_count)] + [str(game_id) for game_id in hltb_ids] + credentials
+    if command == 'steam-id':
+        return ['id', '--steam'] + app_ids + credentials
+
+    raise ValueError('Unknown benchmark command: {0}'.format(command))
+
+# Point script at mock services, rate limiting is relaxed for the local host
+def use_mock_services(base_url: str, backoff_base: float):
+    hltb.HLTB_BASE_URL = base_url
+    hltb.HLTB_ID_URL = base_url + 'game/'
+    hltb.HLTB_SEARCH_URL = base_url + 'api/search'
+    hltb.STEAM_BASE_URL = base_url
+    hltb.STEAM_LIB_URL = base_url + 'IPlayerService/GetOwnedGames/v0001/'
+    hltb.STEAM_REC_URL = base_url + 'IPlayerService/GetRecentlyPlayedGames/v0001/'
+    hltb.STEAM_ITEMS_URL = base_url + 'IStoreBrowseService/GetItems/v1/'
+    hltb.STEAM_STORE_BASE_URL = base_url
+    hltb.STEAM_APP_LOOKUP_URL = base_url + 'api/appdetails'
+
+    hltb.HTTP_RATE_LIMITS['127.0.0.1'] = (1000000, 1000000)
+    hltb.HTTP_BACKOFF_BASE = backoff_base
+    hltb.rate_limiters.clear()
+    hltb.configure_http_client()
+
+# Point script at empty cache, so the next run starts cold
+def use_empty_cache(cache_dir: str, name: str):
+    if hltb.cache_connection:
+        hltb.cache_connection.close()
+
+    hltb.cache_connection = None
+    hltb.title_index = None
+    hltb.CACHE_PATH = os.path.join(cache_dir, name + '.sqlite3')
+
+# Run command once, measuring wall time, requests issued and peak memory
+def run_command(command: str, services: MockServices, measure_memory: bool, process_count: int = 0) -> dict:
+    argv = get_command_argv(command, services, process_count)
+    requests_before = services.total_requests()
+
+    if measure_memory:
+        tracemalloc.start()
+
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+
+        try:
+            start = time.perf_counter()
+            status = hltb.run_cli(argv)
+            wall_time = time.perf_counter() - start
+        finally:
+            sys.stdout = stdout
+
+    peak_memory = None
+
+    if measure_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    requests_issued = services.total_requests() - requests_before
+
+    return {
+        'status': status,
+        'wall_time': wall_time,
+        'requests': requests_issued,
+        'requests_per_second': requests_issued / wall_time if wall_time else 0,
+        'peak_memory_mb': peak_memory / 1024 / 1024 if peak_memory is not None else None,
+    }
+
+# Format benchmark results as aligned text table
+def format_results(results: list) -> str:
+    columns = ['command', 'games', 'cache', 'status', 'wall_time', 'requests', 'requests_per_second', 'peak_memory_mb']
+    rows = [columns]
+
+    for result in results:
+        rows.append([
+            '{0:.2f}'.format(result[column]) if type(result[column]) == float else str(result[column])
+            for column in columns
+        ])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+
+    return '\n'.join(
+        '  '.join(value.rjust(width) for value, width in zip(row, widths))
+        for row in rows
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark commands against local Steam/HLTB stand-ins.')
+    parser.add_argument('--games', type = int, nargs = '+', default = [100, 1000], help = 'library sizes')
+    parser.add_argument(
+        '--commands',
+        nargs = '+',
+        default = ['backlog', 'recent', 'search', 'id', 'steam-id'],
+        choices = ['backlog', 'recent', 'search', 'id', 'steam-id'],
+    )
+    parser.add_argument('--latency', type = float, default = 20, help = 'added latency per request (ms)')
+    parser.add_argument('--error-rate', type = float, default = 0, help = 'fraction of requests that fail')
+    parser.add_argument('--backoff-base', type = float, default = 0.1, help = 'retry backoff base (s)')
+    parser.add_argument('--no-page-data', action = 'store_true', help = 'serve HLTB game pages without embedded JSON')
+    parser.add_argument('--processes', type = int, default = 0, help = 'HLTB page parsing processes for the id command')
+    parser.add_argument('--seed-index', action = 'store_true', help = 'crawl HLTB entries with warmup before each cold run')
+    parser.add_argument('--warm', action = 'store_true', help = 'also run each command again with a warm cache')
+    parser.add_argument('--no-memory', action = 'store_true', help = 'skip peak memory tracing')
+    parser.add_argument('--json', action = 'store_true', help = 'output results as JSON')
+    args = parser.parse_args()
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for game_count in args.games:
+            services = MockServices(game_count, args.latency, args.error_rate, page_data = not args.no_page_data)
+            server, base_url = start_mock_server(services)
+            use_mock_services(base_url, args.backoff_base)
+
+            for command in args.commands:
+                use_empty_cache(cache_dir, '{0}-{1}'.format(command, game_count))
+                cache_states = ['seeded' if args.seed_index else 'cold'] + (['warm'] if args.warm else [])
+
+                if args.seed_index:
+                    hltb.run_cli(['warmup', '--crawl'])
+
+                for cache_state in cache_states:
+                    result = run_command(command, services, not args.no_memory, args.processes)
+                    result.update({'command': command, 'games': game_count, 'cache': cache_state})
+                    results.append(result)
+
+                    print(
+                        'Finished {command} ({games} games, {cache})'.format(
+                            command = command,
+                            games = game_count,
+                            cache = cache_state,
+                        ),
+                        file = sys.stderr,
+                    )
+
+            server.shutdown()
+            server.server_close()
+
+    if args.json:
+        print(json.dumps(results, indent = 2))
+    else:
+        print(format_results(results))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from benchmark import hltb, use_mock_services, use_empty_cache
+from mock_server import MockServices, start_mock_server
+
+# Path to script run by each case
+SCRIPT_PATH = os.path.abspath(hltb.__file__)
+
+# Optional modules reported as loaded or not by each case
+REPORTED_MODULES = ['requests', 'bs4', 'http.server']
+
+# Prefix of line written by child process with the modules it loaded
+MODULES_MARKER = 'IMPORT_TIME_MODULES '
+
+# Run script in child process, reporting loaded modules on exit (also after sys.exit)
+CHILD_CODE = '''
+import sys, json, atexit, runpy
+atexit.register(lambda: print({marker!r} + json.dumps([name for name in {modules!r} if name in sys.modules]), file = sys.stderr))
+sys.argv = [{script!r}] + sys.argv[1:]
+sys.path.insert(0, {script_dir!r})
+if sys.argv[1:] == ['--import-only']:
+    import how_long_to_beat
+else:
+    runpy.run_path({script!r}, run_name = '__main__')
+'''.format(
+    marker = MODULES_MARKER,
+    modules = REPORTED_MODULES,
+    script = SCRIPT_PATH,
+    script_dir = os.path.dirname(SCRIPT_PATH),
+)
+
+# Look up one game against mock services, so the cache can answer it without network access
+def seed_cache(cache_dir: str) -> dict:
+    services = MockServices(100, 0, 0)
+    server, base_url = start_mock_server(services)
+    use_mock_services(base_url, 0)
+    use_empty_cache(cache_dir, 'import-time')
+
+    entry = next(iter(services.hltb_entries.values()))
+
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+
+        try:
+            hltb.run_cli(['search', entry['game_name']])
+        finally:
+            sys.stdout = stdout
+
+    hltb.cache_connection.close()
+    hltb.cache_connection = None
+    server.shutdown()
+    server.server_close()
+
+    return entry
+
+# Get cases as (name, argv), argv None for bare interpreter startup
+def get_cases(entry: dict) -> list:
+    return [
+        ('python', None),
+        ('import', ['--import-only']),
+        ('help', ['--help']),
+        ('search (cached)', ['search', entry['game_name'], '--format', 'json']),
+        ('id (cached)', ['id', str(entry['game_id']), '--format', 'json']),
+    ]
+
+# Run case once in fresh interpreter, measuring wall time and loaded modules
+def run_case(argv: list | None, env: dict) -> tuple:
+    if argv is None:
+        command = [sys.executable, '-c', 'pass']
+    else:
+        command = [sys.executable, '-c', CHILD_CODE] + argv
+
+    start = time.perf_counter()
+    result = subprocess.run(command, env = env, capture_output = True, text = True)
+    wall_time = time.perf_counter() - start
+
+    loaded = []
+
+    for line in result.stderr.splitlines():
+        if line.startswith(MODULES_MARKER):
+            loaded = json.loads(line[len(MODULES_MARKER):])
+
+    return wall_time, result.returncode, loaded
+
+# Format results as aligned text table
+def format_results(results: list) -> str:
+    columns = ['case', 'status', 'min_ms', 'median_ms'] + REPORTED_MODULES
+    rows = [columns]
+
+    for result in results:
+        rows.append([
+            '{0:.1f}'.format(result[column]) if type(result[column]) == float else str(result[column])
+            for column in columns
+        ])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+
+    return '\n'.join(
+        '  '.join(value.rjust(width) for value, width in zip(row, widths))
+        for row in rows
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark start-up time of short commands in a fresh interpreter.')
+    parser.add_argument('--repeat', type = int, default = 10, help = 'runs per case')
+    parser.add_argument('--json', action = 'store_true', help = 'output results as JSON')
+    args = parser.parse_args()
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        entry = seed_cache(cache_dir)
+        env = dict(os.environ, STEAM_BACKLOG_CACHE = hltb.CACHE_PATH)
+
+        for name, argv in get_cases(entry):
+            wall_times = []
+
+            for _ in range(args.repeat):
+                wall_time, status, loaded = run_case(argv, env)
+                wall_times.append(wall_time * 1000)
+
+            result = {
+                'case': name,
+                'status': status,
+                'min_ms': min(wall_times),
+                'median_ms': statistics.median(wall_times),
+            }
+
+            for module in REPORTED_MODULES:
+                result[module] = module in loaded if argv is not None else '-'
+
+            results.append(result)
+            print('Finished {0}'.format(name), file = sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent = 2))
+    else:
+        print(format_results(results))
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Words used to build synthetic game names
+NAME_ADJECTIVES = [
+    'Crimson', 'Silent', 'Hollow', 'Eternal', 'Broken', 'Golden', 'Forgotten', 'Iron',
+    'Shadow', 'Wild', 'Frozen', 'Ancient', 'Neon', 'Savage', 'Lost', 'Burning',
+]
+NAME_NOUNS = [
+    'Frontier', 'Kingdom', 'Odyssey', 'Legacy', 'Horizon', 'Dungeon', 'Empire', 'Voyage',
+    'Requiem', 'Citadel', 'Harbour', 'Protocol', 'Chronicle', 'Outpost', 'Labyrinth', 'Rift',
+]
+NAME_SUFFIXES = ['', '', '', ' II', ' 3', ': Remastered', ' Deluxe Edition', '™']
+
+# Steam store item type for games, other types are applications
+STORE_TYPE_GAME = 0
+STORE_TYPE_SOFTWARE = 6
+
+# Stand-in for Steam and HLTB services with a synthetic library
+class MockServices:
+    def __init__(
+        self,
+        game_count: int = 1000,
+        latency: float = 0,
+        error_rate: float = 0,
+        removed_rate: float = 0.02,
+        app_rate: float = 0.03,
+        no_data_rate: float = 0.05,
+        remake_rate: float = 0.1,
+        seed: int = 0,
+        page_data: bool = True,
+    ):
+        self.latency = latency
+        self.page_data = page_data
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        # Remakes use their own random sequence, so the rest of the library is unchanged by the remake rate
+        self.remake_random = random.Random(seed + 1)
+        self.lock = threading.Lock()
+        self.request_counts = {}
+
+        self.games = []
+        self.games_by_id = {}
+        self.hltb_entries = {}
+        self.hltb_prefixes = {}
+        self.popularity = {}
+
+        for app_id in range(10, (game_count + 1) * 10, 10):
+            name = '{adjective} {noun} {number}{suffix}'.format(
+                adjective = self.random.choice(NAME_ADJECTIVES),
+                noun = self.random.choice(NAME_NOUNS),
+                number = app_id // 10,
+                suffix = self.random.choice(NAME_SUFFIXES),
+            )
+            roll = self.random.random()
+
+            game = {
+                'appid': app_id,
+                'name': name,
+                'playtime_forever': self.random.choice([0, 0, 0, self.random.randint(1, 6000)]),
+                'removed': roll < removed_rate,
+                'type': STORE_TYPE_SOFTWARE if removed_rate <= roll < removed_rate + app_rate else STORE_TYPE_GAME,
+            }
+            self.games.append(game)
+            self.games_by_id[app_id] = game
+
+            if roll > 1 - no_data_rate:
+                continue
+
+            hltb_name = name.replace('™', '').replace(' Deluxe Edition', '')
+            main_story = self.random.randint(1, 80) * 1800
+
+            entry = {
+                'game_id': app_id * 3,
+                'game_name': hltb_name,
+                'comp_main': main_story,
+                'comp_plus': main_story * 2,
+                'comp_100': self.random.choice([0, main_story * 4]),
+                'comp_all': main_story * 3 // 2,
+                'release_world': self.random.randint(1995, 2024),
+                'profile_platform': 'PC',
+            }
+            self.add_hltb_entry(entry, self.remake_random.random())
+
+            # Remakes share the original name, but are more popular so are the top search result
+            if self.remake_random.random() < remake_rate:
+                remake = entry | {
+                    'game_id': entry['game_id'] + 1,
+                    'game_name': hltb_name + ' Remake',
+                    'comp_main': entry['comp_main'] + 3600,
+                    'comp_plus': entry['comp_plus'] + 7200,
+                    'comp_all': entry['comp_all'] + 5400,
+                    'release_world': entry['release_world'] + self.remake_random.randint(5, 20),
+                }
+                self.add_hltb_entry(remake, 1 + self.remake_random.random())
+
+    # Add HLTB entry, indexed by each leading run of words in its name for searches
+    def add_hltb_entry(self, entry: dict, popularity: float):
+        self.hltb_entries[entry['game_id']] = entry
+        self.popularity[entry['game_id']] = popularity
+        words = normalise_search(entry['game_name']).split(' ')
+
+        for i in range(1, len(words) + 1):
+            self.hltb_prefixes.setdefault(' '.join(words[:i]), []).append(entry)
+
+    # Count request against endpoint
+    def count_request(self, endpoint: str):
+        with self.lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    # Total requests served since start
+    def total_requests(self) -> int:
+        with self.lock:
+            return sum(self.request_counts.values())
+
+    # Decide whether request should fail with an injected error
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    # Find HLTB entries for search terms, best match first, along with total matches
+    def search(self, search_terms: list, size: int, page: int = 1) -> tuple:
+        terms = normalise_search(' '.join(search_terms))
+
+        # Empty searches list every game a page at a time, like browsing HLTB
+        if not terms:
+            entries = list(self.hltb_entries.values())
+
+            return (entries[(page - 1) * size:page * size], len(entries))
+
+        # Unmatched searches retry with fewer words, like a loose relevance search
+        words = terms.split(' ')
+
+        for i in range(len(words), 0, -1):
+            entries = self.hltb_prefixes.get(' '.join(words[:i]))
+
+            if entries:
+                entries = sorted(entries, key = lambda entry: self.popularity[entry['game_id']], reverse = True)
+
+                return (entries[(page - 1) * size:page * size], len(entries))
+
+        return ([], 0)
+
+# Normalise search string for name lookup
+def normalise_search(string: str) -> str:
+    string = ''.join(char for char in string.lower() if char.isalnum() or char == ' ')
+
+    return ' '.join(string.split())
+
+# Build HTTP request handler class serving the given mock services
+def get_request_handler(services: MockServices):
+    class MockRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        # Headers and body are written separately, so small responses would otherwise wait on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def send_body(self, body: str, status: int = 200, content_type: str = 'application/json', headers: dict = None):
+            encoded = body.encode('utf-8')
+
+            self.send_response(status)
+            self.send_header('content-type', content_type + '; charset=utf-8')
+            self.send_header('content-length', str(len(encoded)))
+
+            for header, value in (headers or {}).items():
+                self.send_header(header, value)
+
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def send_json(self, data):
+            self.send_body(json.dumps(data))
+
+        # Apply latency/error injection, returning True when an error has been sent
+        def simulate_conditions(self, endpoint: str) -> bool:
+            services.count_request(endpoint)
+
+            if services.latency:
+                time.sleep(services.latency / 1000)
+
+            if services.should_fail():
+                if endpoint == 'appdetails':
+                    self.send_body('', status = 429, headers = {'retry-after': '0'})
+                else:
+                    self.send_body('', status = 503)
+
+                return True
+
+            return False
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+
+            if url.path.endswith('/GetOwnedGames/v0001/'):
+                if self.simulate_conditions('GetOwnedGames'):
+                    return
+
+                games = [
+                    {key: game[key] for key in ['appid', 'name', 'playtime_forever']}
+                    for game in services.games
+                ]
+                self.send_json({'response': {'game_count': len(games), 'games': games}})
+            elif url.path.endswith('/GetRecentlyPlayedGames/v0001/'):
+                if self.simulate_conditions('GetRecentlyPlayedGames'):
+                    return
+
+                played = [game for game in services.games if game['playtime_forever']][:1]
+                games = [
+                    {
+                        'appid': game['appid'],
+                        'name': game['name'],
+                        'playtime_2weeks': min(game['playtime_forever'], 600),
+                        'playtime_forever': game['playtime_forever'],
+                    }
+                    for game in played
+                ]
+                self.send_json({'response': {'total_count': len(games), 'games': games}})
+            elif url.path.endswith('/IStoreBrowseService/GetItems/v1/'):
+                if self.simulate_conditions('GetItems'):
+                    return
+
+                app_ids = [item['appid'] for item in json.loads(query['input_json'][0])['ids']]
+                store_items = [
+                    {
+                        'appid': game['appid'],
+                        'success': 2 if game['removed'] else 1,
+                        'type': game['type'],
+                        'name': game['name'],
+                    }
+                    for game in map(services.games_by_id.get, app_ids) if game
+                ]
+                self.send_json({'response': {'store_items': store_items}})
+            elif url.path.endswith('/api/appdetails'):
+                if self.simulate_conditions('appdetails'):
+                    return
+
+                app_id = query['appids'][0]
+                game = services.games_by_id.get(int(app_id))
+
+                if not game or game['removed']:
+                    self.send_json({app_id: {'success': False}})
+                    return
+
+                app_type = 'game' if game['type'] == STORE_TYPE_GAME else 'application'
+                self.send_json({app_id: {'success': True, 'data': {'type': app_type, 'name': game['name']}}})
+            elif url.path.startswith('/game/'):
+                if self.simulate_conditions('game'):
+                    return
+
+                entry = services.hltb_entries.get(int(url.path.rsplit('/', 1)[-1] or 0))
+
+                if not entry:
+                    self.send_body('Not Found', status = 404, content_type = 'text/html')
+                    return
+
+                self.send_body(get_game_page(entry, services.page_data), content_type = 'text/html')
+            elif url.path == '/stats':
+                self.send_json(services.request_counts)
+            else:
+                self.send_body('Not Found', status = 404, content_type = 'text/plain')
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            body = self.rfile.read(int(self.headers.get('content-length', 0)))
+
+            if not url.path == '/api/search':
+                self.send_body('Not Found', status = 404, content_type = 'text/plain')
+                return
+
+            if self.simulate_conditions('search'):
+                return
+
+            payload = json.loads(body)
+            size = payload.get('size', 1)
+            page = payload.get('searchPage', 1)
+            data, count = services.search(payload['searchTerms'], size, page)
+            self.send_json({
+                'count': count,
+                'pageCurrent': page,
+                'pageTotal': -(-count // size),
+                'pageSize': size,
+                'data': data,
+            })
+
+    return MockRequestHandler
+
+# Format seconds as HLTB game page duration, e.g. '12½ Hours'
+def format_page_time(seconds: int) -> str:
+    if not seconds:
+        return '--'
+
+    hours = round(seconds / 1800) / 2
+    whole_hours = int(hours)
+
+    return '{0}{1} Hours'.format(whole_hours, '½' if hours > whole_hours else '')
+
+# Build HLTB style game page for entry, optionally with embedded Next.js game data
+def get_game_page(entry: dict, page_data: bool = True) -> str:
+    stats = ''
+
+    for label, field in [
+        ('Main Story', 'comp_main'),
+        ('Main + Sides', 'comp_plus'),
+        ('Completionist', 'comp_100'),
+        ('All Styles', 'comp_all'),
+    ]:
+        stats += '<li class="GameStats_short__x"><h4>{0}</h4><h5>{1}</h5></li>'.format(
+            label,
+            format_page_time(entry[field]),
+        )
+
+    script = ''
+
+    if page_data:
+        next_data = {'props': {'pageProps': {'game': {'data': {'game': [entry]}}}}, 'page': '/game/[gameId]'}
+        script = '<script id="__NEXT_DATA__" type="application/json">{0}</script>'.format(json.dumps(next_data))
+
+    return '''<!DOCTYPE html><html><head><title>{name}</title></head><body>
+        <div class="GameHeader_profile_header_game__x"><div class="GameHeader_profile_header__x">{name}</div></div>
+        <div class="GameStats_game_times__x"><ul>{stats}</ul></div>
+        {script}
+    </body></html>'''.format(name = entry['game_name'], stats = stats, script = script)
+
+# Start mock services on a background thread, returning server and base URL
+def start_mock_server(services: MockServices, port: int = 0) -> tuple:
+    server = ThreadingHTTPServer(('127.0.0.1', port), get_request_handler(services))
+    server.daemon_threads = True
+
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+
+    return (server, 'http://127.0.0.1:{0}/'.format(server.server_address[1]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Local stand-in for the Steam and HLTB services.')
+    parser.add_argument('--port', type = int, default = 8080)
+    parser.add_argument('--games', type = int, default = 1000, help = 'synthetic library size')
+    parser.add_argument('--latency', type = float, default = 0, help = 'added latency per request (ms)')
+    parser.add_argument('--error-rate', type = float, default = 0, help = 'fraction of requests that fail')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--no-page-data', action = 'store_true', help = 'serve game pages without embedded JSON')
+    args = parser.parse_args()
+
+    services = MockServices(args.games, args.latency, args.error_rate, seed = args.seed, page_data = not args.no_page_data)
+    server, base_url = start_mock_server(services, args.port)
+
+    print('Serving {games} games at {url}'.format(games = args.games, url = base_url), file = sys.stderr)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+import sys
+import json
+import time
+import argparse
+
+from benchmark import hltb
+
+# Fields of a live HLTB search entry, besides those the script keeps
+HLTB_EXTRA_FIELDS = {
+    'game_alias': '',
+    'game_type': 'game',
+    'game_image': '12345_Example_Game.jpg',
+    'comp_lvl_combine': 0,
+    'comp_lvl_sp': 1,
+    'comp_lvl_co': 0,
+    'comp_lvl_mp': 0,
+    'comp_main_count': 1520,
+    'comp_plus_count': 1675,
+    'comp_100_count': 411,
+    'comp_all_count': 3606,
+    'invested_co': 0,
+    'invested_mp': 0,
+    'invested_co_count': 0,
+    'invested_mp_count': 0,
+    'count_comp': 6873,
+    'count_speedrun': 12,
+    'count_backlog': 14511,
+    'count_review': 1289,
+    'review_score': 86,
+    'count_playing': 148,
+    'count_retired': 402,
+    'profile_popular': 1024,
+}
+
+# Build search response text shaped like a live HLTB response, with size entries
+def get_response_text(size: int) -> str:
+    data = []
+
+    for i in range(size):
+        data.append({
+            'game_id': 1000 + i,
+            'game_name': 'Example Game {0}'.format(i),
+            'comp_main': 36000 + i,
+            'comp_plus': 72000 + i,
+            'comp_100': 144000 + i,
+            'comp_all': 54000 + i,
+            'release_world': 2015,
+            'profile_platform': 'Nintendo Switch, PC, PlayStation 4, Xbox One',
+        } | HLTB_EXTRA_FIELDS)
+
+    return json.dumps({
+        'color': 'blue',
+        'title': '',
+        'category': 'games',
+        'count': size,
+        'pageCurrent': 1,
+        'pageTotal': 1,
+        'pageSize': size,
+        'data': data,
+        'userData': [],
+        'displayModifier': None,
+    })
+
+# Build request body, decode response and serialise top result for the cache as before
+def full_round_trip(search_terms: list, size: int, text: str) -> str:
+    json.dumps(hltb.get_search_payload(search_terms, size = size))
+    data = json.loads(text)['data']
+
+    return json.dumps(data[0])
+
+# Build request body from template, decode only the results and serialise the used fields of the top result
+def template_round_trip(search_terms: list, size: int, text: str) -> str:
+    hltb.get_search_body(search_terms, size = size)
+    data = hltb.decode_search_entries(text)
+
+    return json.dumps(hltb.get_hltb_entry(data[0]))
+
+# Run function repeatedly for duration, returning calls per second on this core
+def measure(function, size: int, duration: float) -> float:
+    search_terms = 'the witcher 3 wild hunt'.split(' ')
+    text = get_response_text(size)
+    calls = 0
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < duration:
+        for _ in range(100):
+            function(search_terms, size, text)
+
+        calls += 100
+
+    return calls / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Micro-benchmark HLTB search request building and response decoding.')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1, 10, 500], help = 'search results per response')
+    parser.add_argument('--duration', type = float, default = 1, help = 'seconds per measurement')
+    parser.add_argument('--json', action = 'store_true', help = 'output results as JSON')
+    args = parser.parse_args()
+
+    results = []
+
+    for size in args.sizes:
+        full = measure(full_round_trip, size, args.duration)
+        template = measure(template_round_trip, size, args.duration)
+
+        results.append({
+            'size': size,
+            'full_per_second': full,
+            'template_per_second': template,
+            'speedup': template / full,
+        })
+
+        print('Finished size {0}'.format(size), file = sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent = 2))
+    else:
+        for result in results:
+            print('size {size:>4}: full {full_per_second:>10.0f}/s, template {template_per_second:>10.0f}/s, {speedup:.2f}x'.format(**result))
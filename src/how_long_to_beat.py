@@ -1,10 +1,30 @@
 #!/usr/bin/env python3
+# Annotations are not evaluated, so lazily imported classes can be used in them
+from __future__ import annotations
+import os
+import re
 import sys
+import math
+import csv
 import json
+import shlex
+import argparse
+import time
+import random
+import sqlite3
+import threading
+import heapq
+from array import array
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from functools import lru_cache, wraps
+from importlib.util import find_spec
+from itertools import compress
 from types import SimpleNamespace
-import requests
-from requests.exceptions import HTTPError
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit, quote, parse_qs
 
 # Global HLTB URL constants
 HLTB_BASE_URL = 'https://howlongtobeat.com/'
@@ -15,6 +35,30 @@ HLTB_SEARCH_URL = HLTB_BASE_URL + 'api/search'
 STEAM_BASE_URL = 'https://api.steampowered.com/'
 STEAM_LIB_URL = STEAM_BASE_URL + 'IPlayerService/GetOwnedGames/v0001/'
 STEAM_REC_URL = STEAM_BASE_URL + 'IPlayerService/GetRecentlyPlayedGames/v0001/'
+STEAM_ITEMS_URL = STEAM_BASE_URL + 'IStoreBrowseService/GetItems/v1/'
+
+# Global Steam store item constants
+STEAM_ITEMS_BATCH_SIZE = 100
+STEAM_ITEM_SUCCESS = 1
+STEAM_ITEM_TYPE_GAME = 0
+
+# Global HLTB game page constants, pages embed their game data as Next.js JSON
+HLTB_PAGE_DATA_PATTERN = re.compile(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+HLTB_PAGE_TIME_FIELDS = {
+    'Main Story': 'comp_main',
+    'Main + Sides': 'comp_plus',
+    'Completionist': 'comp_100',
+    'All Styles': 'comp_all',
+}
+HLTB_PAGE_MULTIPLAYER_FIELDS = {
+    'Co-Op': 'invested_co',
+    'Vs.': 'invested_mp',
+}
+HLTB_PAGE_PARSER = 'lxml' if find_spec('lxml') else 'html.parser'
+
+# Global HLTB search response constants, only the result list and page count are decoded
+HLTB_SEARCH_DATA_PATTERN = re.compile(r'"data"\s*:\s*\[')
+HLTB_SEARCH_PAGE_TOTAL_PATTERN = re.compile(r'"pageTotal"\s*:\s*(\d+)')
 
 STEAM_STORE_BASE_URL = 'https://store.steampowered.com/'
 STEAM_APP_LOOKUP_URL = STEAM_STORE_BASE_URL + 'api/appdetails'
@@ -23,6 +67,269 @@ STEAM_APP_LOOKUP_URL = STEAM_STORE_BASE_URL + 'api/appdetails'
 ERR_HLTB_NO_DATA = 'ERR_HLTB_NO_DATA'
 ERR_STEAM_GAME_REMOVED = 'ERR_STEAM_GAME_REMOVED'
 ERR_STEAM_TYPE_APP = 'ERR_STEAM_TYPE_APP'
+ERR_HTTP = 'ERR_HTTP'
+
+# Global record constants
+RECORD_GAME = 'game'
+RECORD_TOTALS = 'totals'
+RECORD_RUNNING_TOTALS = 'running_totals'
+RECORD_COMBINED_TOTALS = 'combined_totals'
+SOURCE_LIBRARY = 'library'
+SOURCE_RECENT = 'recent'
+SOURCE_SEARCH = 'search'
+SOURCE_STEAM_ID = 'steam_id'
+SOURCE_HLTB_ID = 'hltb_id'
+SOURCE_QUERY = 'query'
+STATUS_OK = 'OK'
+DURATION_FIELDS = ['main_story', 'main_sides', 'completionist', 'all_styles']
+RECORD_FIELDS = [
+    'record',
+    'source',
+    'steam_user_id',
+    'app_id',
+    'hltb_id',
+    'name',
+    'search_term',
+    'status',
+    'playtime_minutes',
+    'recent_playtime_minutes',
+    'owner_count',
+] + DURATION_FIELDS + [
+    'remaining_hours',
+    'user_count',
+    'game_count',
+    'unique_games',
+    'unplayed_games',
+    'error_count',
+    'app_count',
+]
+LIBRARY_PERCENTILES = [0.5, 0.9]
+QUERY_CATEGORIES = {
+    'main': 'main_story',
+    'sides': 'main_sides',
+    'completionist': 'completionist',
+    'all': 'all_styles',
+}
+HLTB_TIME_FIELDS = {
+    'Main Story': 'main_story',
+    'Main + Sides': 'main_sides',
+    'Completionist': 'completionist',
+    'All Styles': 'all_styles',
+}
+STATUS_MESSAGES = {
+    ERR_HLTB_NO_DATA: 'No HLTB data was found for this game.',
+    ERR_STEAM_GAME_REMOVED: 'Unable to find data for this Steam ID, please ensure it is valid/still present on the Steam storefront.',
+    ERR_STEAM_TYPE_APP: 'This Steam ID is not a game, other types of applications are not supported.',
+    ERR_HTTP: 'An error occured making your request. Please try again.',
+}
+
+# Status of game lookup result, values are the status strings written to records
+class GameStatus(Enum):
+    OK = STATUS_OK
+    ERR_HTTP = ERR_HTTP
+    ERR_HLTB_NO_DATA = ERR_HLTB_NO_DATA
+    ERR_STEAM_GAME_REMOVED = ERR_STEAM_GAME_REMOVED
+    ERR_STEAM_TYPE_APP = ERR_STEAM_TYPE_APP
+
+# Global command-line constants
+CLI_BACKLOG = 'backlog'
+CLI_RECENT = 'recent'
+CLI_SEARCH = 'search'
+CLI_ID = 'id'
+CLI_BATCH = 'batch'
+CLI_QUERY = 'query'
+CLI_SERVE = 'serve'
+CLI_WARMUP = 'warmup'
+OUTPUT_TEXT = 'text'
+OUTPUT_JSON = 'json'
+OUTPUT_CSV = 'csv'
+OUTPUT_NDJSON = 'ndjson'
+OUTPUT_FORMATS = [OUTPUT_TEXT, OUTPUT_JSON, OUTPUT_CSV, OUTPUT_NDJSON]
+PROCESSES_AUTO = 'auto'
+
+# Global warm-up constants, crawled pages and dump entries are indexed in batches
+WARMUP_PAGE_SIZE = 500
+WARMUP_BATCH_SIZE = 1000
+
+# Global service mode constants, endpoints run commands with the query parameters allowed here
+SERVE_DEFAULT_HOST = '127.0.0.1'
+SERVE_DEFAULT_PORT = 8080
+SERVE_COMMANDS = {
+    '/search': [CLI_SEARCH],
+    '/id': [CLI_ID],
+    '/steam-id': [CLI_ID, '--steam'],
+    '/recent': [CLI_RECENT],
+    '/library': [CLI_BACKLOG],
+    '/query': [CLI_QUERY],
+}
+SERVE_POSITIONAL = {
+    '/search': 'term',
+    '/id': 'ids',
+    '/steam-id': 'ids',
+}
+SERVE_FLAGS = {
+    '/library': ['backlog', 'sync'],
+    '/query': ['backlog', 'offline'],
+}
+SERVE_OPTIONS = {
+    '/library': ['users'],
+    '/query': ['category', 'min_playtime', 'max_playtime', 'min_remaining', 'max_remaining', 'shortest', 'longest'],
+}
+SERVE_LIST_PARAMS = ['ids', 'users']
+
+# Global concurrency constants, in-flight lookups are bounded per worker
+DEFAULT_WORKER_COUNT = 8
+WORKER_QUEUE_FACTOR = 4
+
+# Global page parsing variables, process pool used by bulk HLTB ID lookups when enabled
+page_parse_executor = None
+
+# Global HTTP client constants, connection pools are kept per host
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = DEFAULT_WORKER_COUNT * 2
+HTTP_TIMEOUT = (5, 30)
+
+# Global HTTP client variables
+http_session = None
+http_session_lock = threading.Lock()
+
+# Global HTTP library variables, requests is only imported by the first HTTP request
+requests = None
+HTTPAdapter = None
+
+# Placeholders for requests' exceptions until it is imported, nothing can raise them before then
+# They must still be exception classes, as except clauses are checked even when nothing was imported
+class HTTPError(Exception):
+    pass
+
+class Timeout(Exception):
+    pass
+
+class RequestConnectionError(Exception):
+    pass
+
+# Global rate limit constants, (requests per second, burst size) per host
+HTTP_RATE_LIMITS = {
+    'howlongtobeat.com': (10, 20),
+    'api.steampowered.com': (10, 20),
+    'store.steampowered.com': (1.5, 10),
+}
+HTTP_DEFAULT_RATE_LIMIT = (10, 20)
+
+# Global retry constants, delays are in seconds
+HTTP_MAX_RETRIES = 5
+HTTP_RETRY_STATUSES = [429, 500, 502, 503, 504]
+HTTP_BACKOFF_BASE = 1
+HTTP_BACKOFF_MAX = 60
+
+# Global rate limit variables
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+# Global metrics constants, latency histogram bucket upper bounds are in seconds
+METRICS_LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+# Global metrics variables
+metrics = {
+    'endpoints': {},
+    'counters': {},
+    'phases': {},
+}
+metrics_lock = threading.Lock()
+
+# Global cache constants
+CACHE_PATH = os.environ.get(
+    'STEAM_BACKLOG_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'steam-backlog', 'cache.sqlite3'),
+)
+CACHE_SOURCE_STEAM_APP = 'steam_app'
+CACHE_SOURCE_HLTB_SEARCH = 'hltb_search'
+CACHE_SOURCE_HLTB_GAME = 'hltb_game'
+CACHE_SOURCE_HLTB_MATCH = 'hltb_match'
+CACHE_TTL = {
+    CACHE_SOURCE_STEAM_APP: 30 * 24 * 60 * 60,
+    CACHE_SOURCE_HLTB_SEARCH: 7 * 24 * 60 * 60,
+    CACHE_SOURCE_HLTB_GAME: 30 * 24 * 60 * 60,
+    CACHE_SOURCE_HLTB_MATCH: 7 * 24 * 60 * 60,
+}
+CACHE_MAX_ENTRIES = 50000
+CACHE_EVICT_INTERVAL = 500
+
+# Global cache variables
+cache_enabled = True
+cache_refresh = False
+cache_connection = None
+cache_lock = threading.Lock()
+cache_write_count = 0
+
+# Global HLTB search body variables, payload is serialised once as a format string
+search_body_template = None
+search_decoder = json.JSONDecoder()
+
+# Global single-flight variables, futures of in-flight lookups by source and normalised key
+in_flight_calls = {}
+in_flight_lock = threading.Lock()
+
+# Global title index constants
+TITLE_MATCH_THRESHOLD = 0.85
+HLTB_ENTRY_FIELDS = [
+    'game_id',
+    'game_name',
+    'comp_main',
+    'comp_plus',
+    'comp_100',
+    'comp_all',
+    'release_world',
+    'profile_platform',
+    'invested_co',
+    'invested_mp',
+]
+ROMAN_NUMERALS = {
+    'ii': '2',
+    'iii': '3',
+    'iv': '4',
+    'v': '5',
+    'vi': '6',
+    'vii': '7',
+    'viii': '8',
+    'ix': '9',
+    'x': '10',
+    'xi': '11',
+    'xii': '12',
+    'xiii': '13',
+    'xiv': '14',
+    'xv': '15',
+}
+EDITION_QUALIFIERS = [
+    'game',
+    'of',
+    'the',
+    'year',
+    'goty',
+    'definitive',
+    'deluxe',
+    'complete',
+    'enhanced',
+    'special',
+    'ultimate',
+    'gold',
+    'standard',
+    'anniversary',
+    'collectors',
+]
+
+# Global search ranking constants, candidates are scored by title similarity with adjustments
+SEARCH_CANDIDATE_COUNT = 10
+SEARCH_RANK_NUMBER_PENALTY = 0.5
+SEARCH_RANK_YEAR_WEIGHT = 0.2
+SEARCH_RANK_PLATFORM_WEIGHT = 0.05
+SEARCH_RANK_PLATFORM = 'PC'
+SEARCH_RANK_MIN_SCORE = 0.5
+RELEASE_YEAR_PATTERN = re.compile(r'\s*\((\d{4})\)\s*$')
+
+# Global title index variables
+title_index = None
+title_index_lock = threading.Lock()
 
 # Global Steam data variables
 global steam_api_key
@@ -45,20 +352,29 @@ colours.RESET = '\u001b[0m'
 COLOUR_SUFFIX = colours.RESET
 global colour_prefix
 
-# Main command branching/user input
+# Main command loop, commands return here rather than recursing so the stack stays bounded
 def main():
+    while True:
+        try:
+            run_menu_command()
+        except EOFError:
+            # Input exhausted (e.g. commands piped through stdin), quit as if requested
+            user_quit()
+
+# Command branching/user input for a single command
+def run_menu_command():
     global colour_prefix
     colour_prefix = colours.GREEN
 
     # Define allowed command terms and optional flags
     CMD_BACKLOG = ['STEAM', 'BACKLOG', 'LIBRARY', 'LIB', 'GAMES']
-    FLAGS_BACKLOG = ['BACKLOG']
+    FLAGS_BACKLOG = ['BACKLOG', 'SYNC', 'RESUME', 'REFRESH']
     CMD_RECENT = ['RECENT', 'PAST', 'LATEST', 'LAST']
-    FLAGS_RECENT = []
+    FLAGS_RECENT = ['REFRESH']
     CMD_SEARCH = ['SEARCH', 'TERM', 'NAME']
     FLAGS_SEARCH = []
     CMD_ID = ['ID', 'DETAIL']
-    FLAGS_ID = ['STEAM']
+    FLAGS_ID = ['STEAM', 'REFRESH']
     CMD_QUIT = ['QUIT', 'Q']
     FLAGS_QUIT = []
 
@@ -104,25 +420,26 @@ def main():
     user_cmd = user_input[0].strip()
     user_flags = user_input[1:]
 
+    # Bypass cached lookups for this command when requested
+    global cache_refresh
+    cache_refresh = 'REFRESH' in user_flags
+
     # Perform user's desired command
     if user_cmd in CMD_BACKLOG or user_cmd == find_cmd_index(cmd_list, CMD_KEY, CMD_BACKLOG[0]):
-        if not user_flags:
-            steam_library()
-
         # TODO: Look into better approach than hardcoding flag strings
         is_backlog = False
         if 'BACKLOG' in user_flags:
             is_backlog = True
 
-        steam_library(is_backlog)
+        is_sync = 'SYNC' in user_flags
+        is_resume = 'RESUME' in user_flags
+
+        steam_library(is_backlog, is_sync = is_sync, is_resume = is_resume)
     elif user_cmd in CMD_RECENT or user_cmd == find_cmd_index(cmd_list, CMD_KEY, CMD_RECENT[0]):
         steam_recently_played()
     elif user_cmd in CMD_SEARCH or user_cmd == find_cmd_index(cmd_list, CMD_KEY, CMD_SEARCH[0]):
         search_name()
     elif user_cmd in CMD_ID or user_cmd == find_cmd_index(cmd_list, CMD_KEY, CMD_ID[0]):
-        if not user_flags:
-            get_by_id()
-
         is_steam_id = False
         if 'STEAM' in user_flags:
             is_steam_id = True
@@ -132,7 +449,6 @@ def main():
         user_quit()
     else:
         print(colourise('Sorry, I don\'t recognise that command.'))
-        main()
 
 # Prefix string with ANSI colour code and suffix with reset code
 def colourise(string: str) -> str:
@@ -162,7 +478,8 @@ def find_cmd_index(cmd_list: list, cmd_key: str, cmd_val: str) -> str:
 
     return str(-1)
 
-# Provide HTTP headers to make requests
+# Provide HTTP headers to make requests, built once per header type
+@lru_cache(maxsize = None)
 def get_http_headers(isJson: bool) -> dict:
     base_headers = {
         'origin': HLTB_BASE_URL,
@@ -175,6 +492,315 @@ def get_http_headers(isJson: bool) -> dict:
 
     return base_headers
 
+# Clear all recorded metrics, e.g. before each command
+def reset_metrics():
+    with metrics_lock:
+        metrics['endpoints'] = {}
+        metrics['counters'] = {}
+        metrics['phases'] = {}
+
+# Increment named counter, e.g. 'cache.steam_app.hit' or 'errors.ERR_HLTB_NO_DATA'
+def increment_metric(name: str, amount: int = 1):
+    with metrics_lock:
+        metrics['counters'][name] = metrics['counters'].get(name, 0) + amount
+
+# Get endpoint name for metrics from URL, excluding IDs and query strings
+def get_endpoint_name(url: str) -> str:
+    url_parts = urlsplit(url)
+    path = url_parts.path.rstrip('/')
+    last_segment = path.rsplit('/', 1)[-1]
+
+    if last_segment.isdigit():
+        path = path[:-len(last_segment) - 1]
+
+    return url_parts.netloc + path
+
+# Record request latency in endpoint histogram along with response status
+def record_request_metric(url: str, seconds: float, status: int | str):
+    endpoint = get_endpoint_name(url)
+
+    with metrics_lock:
+        if endpoint not in metrics['endpoints']:
+            metrics['endpoints'][endpoint] = {
+                'count': 0,
+                'total': 0,
+                'max': 0,
+                'buckets': [0] * (len(METRICS_LATENCY_BUCKETS) + 1),
+            }
+
+        endpoint_metrics = metrics['endpoints'][endpoint]
+        endpoint_metrics['count'] += 1
+        endpoint_metrics['total'] += seconds
+        endpoint_metrics['max'] = max(endpoint_metrics['max'], seconds)
+
+        # Final bucket holds latencies above the largest bound
+        bucket = len(METRICS_LATENCY_BUCKETS)
+        for i, bound in enumerate(METRICS_LATENCY_BUCKETS):
+            if seconds <= bound:
+                bucket = i
+                break
+
+        endpoint_metrics['buckets'][bucket] += 1
+
+    increment_metric('http_status.{0}'.format(status))
+
+# Accumulate time spent in a named phase, phases run across threads may overlap
+@contextmanager
+def timed_phase(name: str):
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        with metrics_lock:
+            metrics['phases'][name] = metrics['phases'].get(name, 0) + time.perf_counter() - start
+
+# Estimate latency percentile from histogram as bucket upper bound
+def get_histogram_percentile(endpoint_metrics: dict, percentile: float) -> float:
+    target = endpoint_metrics['count'] * percentile
+    seen = 0
+
+    for i, count in enumerate(endpoint_metrics['buckets']):
+        seen += count
+
+        if seen >= target and i < len(METRICS_LATENCY_BUCKETS):
+            return METRICS_LATENCY_BUCKETS[i]
+
+    return endpoint_metrics['max']
+
+# Get recorded metrics as JSON serialisable summary
+def get_metrics_summary() -> dict:
+    with metrics_lock:
+        endpoints = {}
+
+        for endpoint, endpoint_metrics in metrics['endpoints'].items():
+            endpoints[endpoint] = {
+                'count': endpoint_metrics['count'],
+                'mean': endpoint_metrics['total'] / endpoint_metrics['count'],
+                'p50': get_histogram_percentile(endpoint_metrics, 0.5),
+                'p95': get_histogram_percentile(endpoint_metrics, 0.95),
+                'max': endpoint_metrics['max'],
+                'histogram': dict(zip(
+                    [str(bound) for bound in METRICS_LATENCY_BUCKETS] + ['inf'],
+                    endpoint_metrics['buckets'],
+                )),
+            }
+
+        return {
+            'endpoints': endpoints,
+            'counters': dict(sorted(metrics['counters'].items())),
+            'phases': dict(metrics['phases']),
+        }
+
+# Get printable summary of recorded metrics
+def get_printable_metrics(summary: dict) -> str:
+    output = 'Request timings:\n'
+
+    for endpoint, endpoint_summary in summary['endpoints'].items():
+        output += '\t{endpoint} - {count} requests, mean {mean:.3f}s, p50 <= {p50:.3f}s, p95 <= {p95:.3f}s, max {max:.3f}s\n'.format(
+            endpoint = endpoint,
+            **endpoint_summary,
+        )
+
+    output += 'Counters:\n'
+
+    for name, count in summary['counters'].items():
+        output += '\t{0} - {1}\n'.format(name, count)
+
+    output += 'Phases:\n'
+
+    for name, seconds in summary['phases'].items():
+        output += '\t{0} - {1:.3f}s\n'.format(name, seconds)
+
+    return output
+
+# Tune shared HTTP client, existing connection pools are discarded
+def configure_http_client(pool_maxsize: int = None, timeout: tuple = None):
+    global HTTP_POOL_MAXSIZE
+    global HTTP_TIMEOUT
+    global http_session
+
+    if pool_maxsize:
+        HTTP_POOL_MAXSIZE = pool_maxsize
+
+    if timeout:
+        HTTP_TIMEOUT = timeout
+
+    with http_session_lock:
+        if http_session:
+            http_session.close()
+
+        http_session = None
+
+# Token bucket limiting request rate to a host, backing off adaptively when throttled
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.max_rate = rate
+        self.min_rate = rate / 16
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    # Block until a request is allowed, reserving a token
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            # Negative tokens are a reservation against future refills
+            delay = max(0, -self.tokens / self.rate, self.paused_until - now)
+
+        if delay:
+            time.sleep(delay)
+
+    # Halve request rate and pause host after being throttled
+    def penalise(self, pause: float = 0):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    # Gradually restore request rate after successful requests
+    def reward(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+# Get rate limiter for host of URL
+def get_rate_limiter(url: str) -> TokenBucket:
+    host = urlsplit(url).hostname
+
+    with rate_limiters_lock:
+        if host not in rate_limiters:
+            rate, capacity = HTTP_RATE_LIMITS.get(host, HTTP_DEFAULT_RATE_LIMIT)
+            rate_limiters[host] = TokenBucket(rate, capacity)
+
+        return rate_limiters[host]
+
+# Exponential backoff delay with jitter for retry attempt
+def get_backoff_delay(attempt: int) -> float:
+    delay = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt)
+
+    return delay / 2 + random.uniform(0, delay / 2)
+
+# Parse Retry-After header in seconds or HTTP date format
+def get_retry_after(response: requests.Response) -> float:
+    retry_after = response.headers.get('retry-after')
+
+    if not retry_after:
+        return 0
+
+    if retry_after.isdigit():
+        return min(HTTP_BACKOFF_MAX, int(retry_after))
+
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return 0
+
+    return min(HTTP_BACKOFF_MAX, max(0, retry_date.timestamp() - time.time()))
+
+# Import requests on first use, replacing placeholder globals with its classes
+def load_http_library():
+    global requests
+    global HTTPAdapter
+    global HTTPError
+    global Timeout
+    global RequestConnectionError
+
+    if requests is not None:
+        return
+
+    import requests as requests_library
+    from requests import adapters, exceptions
+
+    HTTPAdapter = adapters.HTTPAdapter
+    HTTPError = exceptions.HTTPError
+    Timeout = exceptions.Timeout
+    RequestConnectionError = exceptions.ConnectionError
+    requests = requests_library
+
+# Get shared HTTP session with keep-alive connection pools for each service
+def get_http_session() -> requests.Session:
+    global http_session
+    if http_session:
+        return http_session
+
+    load_http_library()
+
+    with http_session_lock:
+        if http_session:
+            return http_session
+
+        session = requests.Session()
+
+        for base_url in [HLTB_BASE_URL, STEAM_BASE_URL, STEAM_STORE_BASE_URL]:
+            adapter = HTTPAdapter(
+                pool_connections = HTTP_POOL_CONNECTIONS,
+                pool_maxsize = HTTP_POOL_MAXSIZE,
+            )
+            session.mount(base_url, adapter)
+
+        http_session = session
+
+    return http_session
+
+# Make rate limited request through shared HTTP session, retrying throttled/failed requests
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    limiter = get_rate_limiter(url)
+    session = get_http_session()
+
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        limiter.acquire()
+
+        if attempt:
+            increment_metric('retries')
+
+        start = time.perf_counter()
+
+        try:
+            response = session.request(
+                method = method,
+                url = url,
+                timeout = HTTP_TIMEOUT,
+                **kwargs,
+            )
+        except (RequestConnectionError, Timeout) as e:
+            record_request_metric(url, time.perf_counter() - start, type(e).__name__)
+
+            if attempt == HTTP_MAX_RETRIES:
+                raise
+
+            time.sleep(get_backoff_delay(attempt))
+            continue
+
+        record_request_metric(url, time.perf_counter() - start, response.status_code)
+
+        # Final attempt response is returned for caller to handle as before
+        if response.status_code not in HTTP_RETRY_STATUSES or attempt == HTTP_MAX_RETRIES:
+            if response.ok:
+                limiter.reward()
+
+            return response
+
+        delay = get_retry_after(response) or get_backoff_delay(attempt)
+
+        if response.status_code == 429:
+            limiter.penalise(delay)
+
+        time.sleep(delay)
+
+# Make GET request through shared HTTP session
+def http_get(url: str, headers: dict) -> requests.Response:
+    return http_request('GET', url, headers = headers)
+
+# Make POST request through shared HTTP session
+def http_post(url: str, data: str, headers: dict) -> requests.Response:
+    return http_request('POST', url, data = data, headers = headers)
+
 # Handle HTTP errors and output to the console
 def handle_http_error(e: HTTPError):
     global colour_prefix
@@ -188,7 +814,8 @@ def handle_http_error(e: HTTPError):
         reason = e.response.reason
     )
 
-    print(colourise(err_str))
+    # Errors are kept separate from machine-readable output
+    print(colourise(err_str), file = sys.stderr)
 
 # Format seconds to hours rounded to nearest .5
 def format_half_hours(seconds: int) -> float | str:
@@ -269,16 +896,463 @@ def get_printable_game_data(
 
     return output
 
-# Search API for game by term and return entire game data JSON
-def api_search(search_str: str) -> dict:
-    search_terms = search_str.split(' ')
+# Open (and create if required) the on-disk lookup cache
+def get_cache_connection() -> sqlite3.Connection:
+    global cache_connection
+    if cache_connection:
+        return cache_connection
+
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok = True)
+
+    connection = sqlite3.connect(CACHE_PATH, check_same_thread = False)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('''CREATE TABLE IF NOT EXISTS cache (
+        source TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL,
+        PRIMARY KEY (source, key)
+    )''')
+    connection.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+    connection.execute('''CREATE TABLE IF NOT EXISTS hltb_games (
+        game_id INTEGER PRIMARY KEY,
+        normalised_name TEXT NOT NULL,
+        data TEXT NOT NULL,
+        updated REAL NOT NULL
+    )''')
+    connection.execute('CREATE INDEX IF NOT EXISTS hltb_games_name ON hltb_games (normalised_name)')
+    connection.execute('''CREATE TABLE IF NOT EXISTS steam_hltb_map (
+        app_id INTEGER PRIMARY KEY,
+        game_id INTEGER NOT NULL,
+        updated REAL NOT NULL
+    )''')
+    connection.execute('''CREATE TABLE IF NOT EXISTS library_snapshot (
+        steam_user_id TEXT NOT NULL,
+        app_id INTEGER NOT NULL,
+        record TEXT NOT NULL,
+        updated REAL NOT NULL,
+        PRIMARY KEY (steam_user_id, app_id)
+    )''')
+    connection.execute('''CREATE TABLE IF NOT EXISTS scan_progress (
+        steam_user_id TEXT PRIMARY KEY,
+        started REAL NOT NULL,
+        completed REAL
+    )''')
+    connection.commit()
+
+    cache_connection = connection
+
+    return cache_connection
+
+# Normalise search string so equivalent searches share a cache entry
+def normalise_cache_key(string: str) -> str:
+    return ' '.join(str(string).lower().split())
+
+# Share one call between concurrent callers with the same normalised key, followers get the leader's result or exception
+def single_flight(source: str):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(key, *args, **kwargs):
+            flight_key = (source, normalise_cache_key(key))
+
+            with in_flight_lock:
+                future = in_flight_calls.get(flight_key)
+                is_leader = future is None
+
+                if is_leader:
+                    future = Future()
+                    in_flight_calls[flight_key] = future
+
+            if not is_leader:
+                increment_metric('coalesced.{0}'.format(source))
+                return future.result()
+
+            try:
+                result = fn(key, *args, **kwargs)
+                future.set_result(result)
+
+                return result
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            finally:
+                with in_flight_lock:
+                    del in_flight_calls[flight_key]
+
+        return wrapper
+
+    return decorator
+
+# Get unexpired value from cache, or None if missing/expired/bypassed
+def cache_get(source: str, key: str):
+    if not cache_enabled or cache_refresh:
+        return None
+
+    key = normalise_cache_key(key)
+    now = time.time()
+
+    with cache_lock:
+        connection = get_cache_connection()
+        row = connection.execute(
+            'SELECT value, created FROM cache WHERE source = ? AND key = ?',
+            (source, key),
+        ).fetchone()
+
+        if not row:
+            increment_metric('cache.{0}.miss'.format(source))
+            return None
+
+        value, created = row
+
+        # Expired entries are removed so they are re-fetched
+        if now - created > CACHE_TTL[source]:
+            connection.execute('DELETE FROM cache WHERE source = ? AND key = ?', (source, key))
+            connection.commit()
+            increment_metric('cache.{0}.expired'.format(source))
+            return None
+
+        connection.execute(
+            'UPDATE cache SET accessed = ? WHERE source = ? AND key = ?',
+            (now, source, key),
+        )
+        connection.commit()
+
+    increment_metric('cache.{0}.hit'.format(source))
+
+    return json.loads(value)
+
+# Store value in cache, evicting least recently used entries when full
+def cache_set(source: str, key: str, value):
+    if not cache_enabled or value is None:
+        return
+
+    key = normalise_cache_key(key)
+    now = time.time()
+
+    global cache_write_count
+    with cache_lock:
+        connection = get_cache_connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO cache (source, key, value, created, accessed) VALUES (?, ?, ?, ?, ?)',
+            (source, key, json.dumps(value), now, now),
+        )
+
+        cache_write_count += 1
+        if cache_write_count % CACHE_EVICT_INTERVAL == 0:
+            evict_cache_entries(connection)
+
+        connection.commit()
+
+# Remove least recently accessed entries exceeding maximum cache size
+def evict_cache_entries(connection: sqlite3.Connection):
+    entry_count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+    excess = entry_count - CACHE_MAX_ENTRIES
+
+    if excess <= 0:
+        return
+
+    connection.execute(
+        'DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY accessed LIMIT ?)',
+        (excess,),
+    )
+
+# Load game records from previous library scans for Steam user, keyed by app ID, optionally only those saved since a time
+def load_library_snapshot(user_id: str, since: float = 0) -> dict:
+    with cache_lock:
+        rows = get_cache_connection().execute(
+            'SELECT app_id, record FROM library_snapshot WHERE steam_user_id = ? AND updated >= ?',
+            (user_id, since),
+        ).fetchall()
+
+    return {app_id: GameResult.from_record(json.loads(record)) for app_id, record in rows}
+
+# Store resolved library game in snapshot for Steam user, saved as its output record
+# Durations are also saved in seconds, as record hours are rounded
+def save_snapshot_result(user_id: str, result: GameResult):
+    record = result.to_record(SOURCE_LIBRARY)
+    record['seconds'] = {field: getattr(result, field) for field in DURATION_FIELDS}
+
+    with cache_lock:
+        connection = get_cache_connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO library_snapshot (steam_user_id, app_id, record, updated) VALUES (?, ?, ?, ?)',
+            (user_id, result.app_id, json.dumps(record), time.time()),
+        )
+        connection.commit()
+
+# Get start time of interrupted library scan for Steam user, None when the last scan completed
+def get_interrupted_scan(user_id: str) -> float | None:
+    with cache_lock:
+        row = get_cache_connection().execute(
+            'SELECT started, completed FROM scan_progress WHERE steam_user_id = ?',
+            (user_id,),
+        ).fetchone()
+
+    if not row or row[1] is not None:
+        return None
+
+    return row[0]
+
+# Record start of library scan for Steam user, games saved to the snapshot since then are its checkpoints
+def start_scan_progress(user_id: str, started: float):
+    with cache_lock:
+        connection = get_cache_connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO scan_progress (steam_user_id, started, completed) VALUES (?, ?, NULL)',
+            (user_id, started),
+        )
+        connection.commit()
+
+# Mark library scan for Steam user as completed, so it is no longer resumed
+def complete_scan_progress(user_id: str):
+    with cache_lock:
+        connection = get_cache_connection()
+        connection.execute(
+            'UPDATE scan_progress SET completed = ? WHERE steam_user_id = ?',
+            (time.time(), user_id),
+        )
+        connection.commit()
+
+# Remove games no longer owned by Steam user from snapshot
+def remove_stale_snapshot_games(user_id: str, owned_app_ids: set):
+    with cache_lock:
+        connection = get_cache_connection()
+        snapshot_ids = connection.execute(
+            'SELECT app_id FROM library_snapshot WHERE steam_user_id = ?',
+            (user_id,),
+        ).fetchall()
+
+        connection.executemany(
+            'DELETE FROM library_snapshot WHERE steam_user_id = ? AND app_id = ?',
+            [(user_id, app_id) for (app_id,) in snapshot_ids if app_id not in owned_app_ids],
+        )
+        connection.commit()
+
+# Normalise game title for matching, e.g. 'The Witcher® III: Wild Hunt - GOTY Edition' to 'the witcher 3 wild hunt'
+# Release years are removed, e.g. 'God of War (2018)' to 'god of war', so they are not compared as sequel numbers
+def normalise_title(string: str, is_numeral_converted: bool = True) -> str:
+    string = RELEASE_YEAR_PATTERN.sub('', string)
+    string = strip_trademark_symbols(string)
+    string = strip_apostrophes(string).lower()
+
+    # Punctuation is treated as word separators
+    string = ''.join(char if char.isalnum() else ' ' for char in string)
+    words = string.split()
+
+    # First word is never a sequel number, e.g. 'V Rising' or 'X-Men'
+    if is_numeral_converted:
+        words = words[:1] + [ROMAN_NUMERALS.get(word, word) for word in words[1:]]
+
+    # Remove trailing edition qualifiers, improves matching between Steam and HLTB names
+    if words and words[-1] in ['edition', 'goty']:
+        words.pop()
+
+        while len(words) > 1 and words[-1] in EDITION_QUALIFIERS:
+            words.pop()
+
+    return ' '.join(words)
+
+# Get set of character trigrams for normalised title
+def get_trigrams(string: str) -> set:
+    padded = '  {0} '.format(string)
+
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Get numeric words (including converted roman numerals) from normalised title
+def get_title_numbers(string: str) -> list:
+    return [word for word in string.split() if word.isdigit()]
+
+# Load persisted HLTB entries into in-memory title index, once per process
+def load_title_index():
+    global title_index
+    if title_index is not None:
+        return
+
+    with title_index_lock:
+        if title_index is not None:
+            return
+
+        index = {'titles': {}, 'entries': {}, 'trigrams': {}, 'title_info': {}}
+
+        if cache_enabled:
+            with cache_lock:
+                rows = get_cache_connection().execute(
+                    'SELECT data FROM hltb_games WHERE updated > ?',
+                    (time.time() - CACHE_TTL[CACHE_SOURCE_HLTB_GAME],),
+                ).fetchall()
+
+            for (data,) in rows:
+                index_title_entry(index, json.loads(data))
+
+        title_index = index
+
+# Get HLTB entry with only the fields that are used, live search entries have many more
+def get_hltb_entry(entry: dict) -> dict:
+    return {field: entry.get(field) for field in HLTB_ENTRY_FIELDS}
+
+# Add HLTB entry to index structures, callers hold title index lock
+# Different games can share a normalised title (e.g. remakes), so each title keeps all of their IDs
+def index_title_entry(index: dict, entry: dict):
+    normalised_name = normalise_title(entry['game_name'])
+
+    if normalised_name not in index['titles']:
+        trigrams = get_trigrams(normalised_name)
+
+        for trigram in trigrams:
+            index['trigrams'].setdefault(trigram, set()).add(normalised_name)
+
+        # Kept for scoring, so candidate titles are not split up again on every lookup
+        index['title_info'][normalised_name] = (len(trigrams), get_title_numbers(normalised_name))
+
+    game_ids = index['titles'].setdefault(normalised_name, [])
+
+    if entry['game_id'] not in game_ids:
+        game_ids.append(entry['game_id'])
+
+    index['entries'][entry['game_id']] = entry
+
+# Get only HLTB entry for normalised title, None when games share the title so candidates must be ranked
+# Titles that only share a key through numeral conversion (e.g. 'Mega Man X' and 'Mega Man 10') are told apart
+# by their unconverted name when given, callers hold title index lock
+def get_unambiguous_entry(index: dict, normalised_name: str, unconverted_name: str = None) -> dict | None:
+    entries = [index['entries'][game_id] for game_id in index['titles'].get(normalised_name, [])]
+
+    if len(entries) > 1 and unconverted_name:
+        entries = [
+            entry for entry in entries
+            if normalise_title(entry['game_name'], False) == unconverted_name
+        ]
+
+    if not len(entries) == 1:
+        return None
+
+    return entries[0]
+
+# Add HLTB search entries to title index and persist them for future runs
+def add_to_title_index(entries: list):
+    if not cache_enabled:
+        return
+
+    load_title_index()
+
+    entries = [get_hltb_entry(entry) for entry in entries]
+    now = time.time()
+
+    with title_index_lock:
+        for entry in entries:
+            index_title_entry(title_index, entry)
+
+    with cache_lock:
+        connection = get_cache_connection()
+        connection.executemany(
+            'INSERT OR REPLACE INTO hltb_games (game_id, normalised_name, data, updated) VALUES (?, ?, ?, ?)',
+            [(entry['game_id'], normalise_title(entry['game_name']), json.dumps(entry), now) for entry in entries],
+        )
+        connection.commit()
+
+# Find closest HLTB entry in title index by trigram similarity, None when no close match
+def find_title_match(game_name: str) -> dict | None:
+    if not cache_enabled or cache_refresh:
+        return None
+
+    load_title_index()
+    normalised_name = normalise_title(game_name)
+
+    with title_index_lock:
+        # Exact normalised matches avoid scoring entirely
+        if normalised_name in title_index['titles']:
+            return get_unambiguous_entry(title_index, normalised_name, normalise_title(game_name, False))
+
+        trigrams = get_trigrams(normalised_name)
+        trigram_titles = sorted((title_index['trigrams'].get(trigram, set()) for trigram in trigrams), key = len)
+
+        # Titles sharing too few trigrams cannot reach the threshold, however few trigrams they have
+        # Any close title shares at least one of the rarest trigrams beyond that, so only those are candidates
+        min_shared = math.ceil(TITLE_MATCH_THRESHOLD * len(trigrams) / (2 - TITLE_MATCH_THRESHOLD) - 1e-9)
+        candidates = set().union(*trigram_titles[:len(trigrams) - min_shared + 1])
+        shared_counts = Counter()
+
+        for titles in trigram_titles:
+            shared_counts.update(candidates.intersection(titles))
+
+        # Indexed titles are only ever added, so their info can be read once the lock is released
+        title_info = title_index['title_info']
+
+    numbers = get_title_numbers(normalised_name)
+    best_title = None
+    best_score = 0
+
+    for title, shared in shared_counts.items():
+        trigram_count, title_numbers = title_info[title]
+
+        # Sequels differ by little more than a number, so numbers must match exactly
+        if not title_numbers == numbers:
+            continue
+
+        # Dice coefficient between trigram sets
+        score = 2 * shared / (len(trigrams) + trigram_count)
+
+        if score > best_score:
+            best_title = title
+            best_score = score
+
+    if best_score < TITLE_MATCH_THRESHOLD:
+        return None
+
+    with title_index_lock:
+        return get_unambiguous_entry(title_index, best_title)
+
+# Get HLTB entry from title index by HLTB game ID
+def get_indexed_entry(game_id: int) -> dict | None:
+    if not cache_enabled or cache_refresh:
+        return None
+
+    load_title_index()
+
+    with title_index_lock:
+        return title_index['entries'].get(int(game_id))
+
+# Get HLTB entry previously matched to Steam app ID
+def get_mapped_title(app_id: int) -> dict | None:
+    if not cache_enabled or cache_refresh:
+        return None
+
+    load_title_index()
+
+    with cache_lock:
+        row = get_cache_connection().execute(
+            'SELECT game_id FROM steam_hltb_map WHERE app_id = ?',
+            (int(app_id),),
+        ).fetchone()
+
+    if not row:
+        return None
 
-    # Build search JSON payload
-    search_payload = {
+    with title_index_lock:
+        return title_index['entries'].get(row[0])
+
+# Remember HLTB entry matched to Steam app ID
+def map_steam_title(app_id: int, entry: dict):
+    if not cache_enabled:
+        return
+
+    with cache_lock:
+        connection = get_cache_connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO steam_hltb_map (app_id, game_id, updated) VALUES (?, ?, ?)',
+            (int(app_id), entry['game_id'], time.time()),
+        )
+        connection.commit()
+
+# Build HLTB search JSON payload for search terms and result page
+def get_search_payload(search_terms: list, page: int = 1, size: int = 1) -> dict:
+    return {
         'searchType': 'games',
         'searchTerms': search_terms,
-        'searchPage': 1,
-        'size': 1,
+        'searchPage': page,
+        'size': size,
         'searchOptions': {
             'games': {
                 'userId': 0,
@@ -309,27 +1383,156 @@ def api_search(search_str: str) -> dict:
         },
     }
 
+# Get serialised HLTB search request body, only search terms, page and size vary between calls
+def get_search_body(search_terms: list, page: int = 1, size: int = 1) -> str:
+    global search_body_template
+    if search_body_template is None:
+        # Marker values are replaced by format fields, after escaping the JSON braces
+        template = json.dumps(get_search_payload(['{terms}'], '{page}', '{size}'))
+        template = template.replace('{', '{{').replace('}', '}}')
+        template = template.replace('["{{terms}}"]', '{terms}')
+        template = template.replace('"{{page}}"', '{page}').replace('"{{size}}"', '{size}')
+        search_body_template = template
+
+    return search_body_template.format(terms = json.dumps(search_terms), page = int(page), size = int(size))
+
+# Decode HLTB search results from response text, skipping the other top-level fields
+def decode_search_entries(text: str) -> list:
+    data = None
+    match = HLTB_SEARCH_DATA_PATTERN.search(text)
+
+    # Other top-level fields are skipped, falling back to decoding everything if the list is not where expected
+    if match:
+        try:
+            data = search_decoder.raw_decode(text, match.end() - 1)[0]
+        except ValueError:
+            pass
+
+    # A nested 'data' list could come first, HLTB entries always have an ID
+    if data is None or (data and not (type(data[0]) == dict and 'game_id' in data[0])):
+        data = json.loads(text)['data']
+
+    return data
+
+# Get total number of HLTB search result pages from response text, None when missing
+def decode_search_page_total(text: str) -> int | None:
+    match = HLTB_SEARCH_PAGE_TOTAL_PATTERN.search(text)
+
+    return int(match.group(1)) if match else None
+
+# Request page of HLTB search results for term, None when the request failed
+def request_search(search_str: str, size: int = 1) -> list | None:
     # Set required request headers
     search_headers = get_http_headers(True)
 
-    response = requests.post(
+    response = http_post(
         url = HLTB_SEARCH_URL,
-        data = json.dumps(search_payload),
+        data = get_search_body(search_str.split(' '), size = size),
         headers = search_headers,
     )
 
     try:
         # Parse request response
         response.raise_for_status()
-        data = json.loads(response.text)['data']
 
-        if not data:
-            return ERR_HLTB_NO_DATA
-
-        return data[0]
+        return decode_search_entries(response.text)
     except HTTPError as e:
         handle_http_error(e)
 
+# Search API for game by term and return entire game data JSON
+@single_flight(CACHE_SOURCE_HLTB_SEARCH)
+def api_search(search_str: str) -> dict:
+    cached_data = cache_get(CACHE_SOURCE_HLTB_SEARCH, search_str)
+    if cached_data:
+        return cached_data
+
+    data = request_search(search_str)
+
+    if data is None:
+        return None
+
+    if not data:
+        cache_set(CACHE_SOURCE_HLTB_SEARCH, search_str, ERR_HLTB_NO_DATA)
+        return ERR_HLTB_NO_DATA
+
+    entry = get_hltb_entry(data[0])
+    cache_set(CACHE_SOURCE_HLTB_SEARCH, search_str, entry)
+
+    return entry
+
+# Get release year from game name, e.g. 2016 from 'DOOM (2016)', None when name has no year
+def get_release_year(game_name: str) -> int | None:
+    match = RELEASE_YEAR_PATTERN.search(game_name)
+
+    return int(match.group(1)) if match else None
+
+# Get similarity of normalised titles as Dice coefficient between trigram sets
+def get_title_similarity(title: str, other_title: str) -> float:
+    trigrams = get_trigrams(title)
+    other_trigrams = get_trigrams(other_title)
+
+    return 2 * len(trigrams & other_trigrams) / (len(trigrams) + len(other_trigrams))
+
+# Score HLTB search candidate against Steam game name, higher is a better match
+def score_search_candidate(normalised_name: str, release_year: int | None, candidate: dict) -> float:
+    title = normalise_title(candidate['game_name'])
+    score = get_title_similarity(normalised_name, title)
+
+    # Differing numbers are likely sequels or remakes of the same series
+    if not get_title_numbers(title) == get_title_numbers(normalised_name):
+        score -= SEARCH_RANK_NUMBER_PENALTY
+
+    # Year in the candidate name is only used when HLTB has no release year for it
+    candidate_year = candidate.get('release_world') or get_release_year(candidate['game_name'])
+
+    if release_year and candidate_year:
+        score += SEARCH_RANK_YEAR_WEIGHT if candidate_year == release_year else -SEARCH_RANK_YEAR_WEIGHT
+
+    if SEARCH_RANK_PLATFORM in (candidate.get('profile_platform') or '').split(', '):
+        score += SEARCH_RANK_PLATFORM_WEIGHT
+
+    return score
+
+# Pick best HLTB search candidate for Steam game name, ties keep the more popular candidate
+# None when no candidate is close enough, as loose searches can return unrelated games
+def rank_search_candidates(game_name: str, candidates: list) -> dict | None:
+    release_year = get_release_year(game_name)
+    normalised_name = normalise_title(game_name)
+    best_candidate = None
+    best_score = SEARCH_RANK_MIN_SCORE
+
+    for candidate in candidates:
+        score = score_search_candidate(normalised_name, release_year, candidate)
+
+        if score > best_score:
+            best_candidate = candidate
+            best_score = score
+
+    return best_candidate
+
+# Search API for page of candidates matching Steam game name, returning the best ranked match
+@single_flight(CACHE_SOURCE_HLTB_MATCH)
+def api_match_search(game_name: str) -> dict:
+    cached_data = cache_get(CACHE_SOURCE_HLTB_MATCH, game_name)
+    if cached_data:
+        return cached_data
+
+    # Get completion data from HLTB API using compatible name
+    name_searchable = RELEASE_YEAR_PATTERN.sub('', game_name)
+    name_searchable = strip_trailing_edition(name_searchable)
+    name_searchable = strip_apostrophes(name_searchable)
+    candidates = request_search(name_searchable, SEARCH_CANDIDATE_COUNT)
+
+    if candidates is None:
+        return None
+
+    # Candidates are kept, so later lookups of those games can use the title index
+    add_to_title_index(candidates)
+    entry = rank_search_candidates(game_name, candidates) or ERR_HLTB_NO_DATA
+    cache_set(CACHE_SOURCE_HLTB_MATCH, game_name, entry)
+
+    return entry
+
 # Get Steam API key/user ID from memory or user
 def get_steam_details():
     global steam_api_key
@@ -341,7 +1544,11 @@ def get_steam_details():
         steam_user_id = input(colourise('Please enter your Steam account ID...'))
 
 # Lookup game name from Steam app ID
+@single_flight(CACHE_SOURCE_STEAM_APP)
 def app_id_lookup(app_id: int) -> str:
+    cached_name = cache_get(CACHE_SOURCE_STEAM_APP, app_id)
+    if cached_name:
+        return cached_name
 
     lookup_url = '{url}?appids={id}&filters=basic'.format(
         url = STEAM_APP_LOOKUP_URL,
@@ -350,7 +1557,7 @@ def app_id_lookup(app_id: int) -> str:
 
     lookup_headers = get_http_headers(True)
 
-    response = requests.get(
+    response = http_get(
         url = lookup_url,
         headers = lookup_headers,
     )
@@ -361,375 +1568,1336 @@ def app_id_lookup(app_id: int) -> str:
         data = json.loads(response.text)
 
         if not data or not data[str(app_id)]['success']:
+            cache_set(CACHE_SOURCE_STEAM_APP, app_id, ERR_STEAM_GAME_REMOVED)
             return ERR_STEAM_GAME_REMOVED
 
         if not data[str(app_id)]['data']['type'] == 'game':
+            cache_set(CACHE_SOURCE_STEAM_APP, app_id, ERR_STEAM_TYPE_APP)
             return ERR_STEAM_TYPE_APP
 
         name = data[str(app_id)]['data']['name']
         name = strip_trademark_symbols(name)
+        cache_set(CACHE_SOURCE_STEAM_APP, app_id, name)
 
         return name
     except HTTPError as e:
         handle_http_error(e)
 
-# Output game completion data from Steam library
-def steam_library(is_backlog: bool =  False):
-    global colour_prefix
-    colour_prefix = colours.CYAN
+# Lookup names/types for many Steam app IDs in batches, missing IDs are omitted
+@timed_phase('bulk_name_lookup')
+def bulk_app_lookup(app_ids: list, owned_names: dict = None) -> dict:
+    owned_names = owned_names or {}
+    app_names = {}
+    uncached_ids = []
 
-    global steam_api_key
-    global steam_user_id
-    get_steam_details()
+    for app_id in app_ids:
+        cached_name = cache_get(CACHE_SOURCE_STEAM_APP, app_id)
 
-    # Create request to API endpoint for all user's games
-    user_library_url = '{base}?key={key}&steamid={id}'.format(
-        base = STEAM_LIB_URL,
-        key = steam_api_key,
-        id = steam_user_id,
-    )
+        if cached_name:
+            app_names[app_id] = cached_name
+        else:
+            uncached_ids.append(app_id)
 
-    library_headers = get_http_headers(True)
+    lookup_headers = get_http_headers(True)
 
-    response = requests.get(
-        url = user_library_url,
-        headers = library_headers,
-    )
+    for i in range(0, len(uncached_ids), STEAM_ITEMS_BATCH_SIZE):
+        batch_ids = uncached_ids[i:i + STEAM_ITEMS_BATCH_SIZE]
 
-    try:
-        # Parse request response
-        response.raise_for_status()
-        data = json.loads(response.text)['response']
+        input_json = {
+            'ids': [{'appid': app_id} for app_id in batch_ids],
+            'context': {
+                'language': 'english',
+                'country_code': 'US',
+            },
+        }
 
-        # TODO: Consider creating a cached version of the necessary data in an object for future use
-        if not data:
-            print(colourise('No data returned from Steam. Please check the visibility of your user profile.'))
-            steam_api_key = ''
-            steam_user_id = ''
-            main()
+        lookup_url = '{url}?input_json={input}'.format(
+            url = STEAM_ITEMS_URL,
+            input = quote(json.dumps(input_json, separators = (',', ':'))),
+        )
 
-        total_games = str(data['game_count'])
+        response = http_get(
+            url = lookup_url,
+            headers = lookup_headers,
+        )
 
-        if not total_games:
-            print(colourise('You have no games in your library... :('))
+        # Failed batches are left for per-ID lookups to resolve
+        if not response.ok:
+            continue
 
-        print(colourise('Your have {num} games in your library!'.format(num = total_games)))
+        store_items = json.loads(response.text).get('response', {}).get('store_items', [])
+
+        for item in store_items:
+            app_id = item.get('appid', item.get('id'))
 
-        games_list = data['games']
-        total_unplayed_games = 0
-        total_playtime = 0
-        story_dur_total = 0
-        sides_dur_total = 0
-        compl_dur_total = 0
-        style_dur_total = 0
-        error_count = 0
-        app_count = 0
-
-        for game in games_list:
-            game_id = game['appid']
-            game_playtime = game['playtime_forever']
-
-            # Only interested in games with no playtime in backlog mode
-            if is_backlog and game_playtime:
+            if app_id not in batch_ids:
                 continue
 
-            game_name = app_id_lookup(game_id)
+            if not item.get('success') == STEAM_ITEM_SUCCESS:
+                name = ERR_STEAM_GAME_REMOVED
+            elif not item.get('type', STEAM_ITEM_TYPE_GAME) == STEAM_ITEM_TYPE_GAME:
+                name = ERR_STEAM_TYPE_APP
+            else:
+                name = item.get('name') or owned_names.get(app_id)
 
-            # Error getting game name from Steam lookup
-            if game_name == ERR_STEAM_GAME_REMOVED:
-                error_count += 1
-                continue
+                if not name:
+                    continue
 
-            # Game is a different type of application (e.g. art program like Aesprite or Blender)
-            if game_name == ERR_STEAM_TYPE_APP:
-                app_count += 1
-                continue
+                name = strip_trademark_symbols(name)
 
-            total_playtime += game_playtime
+            cache_set(CACHE_SOURCE_STEAM_APP, app_id, name)
+            app_names[app_id] = name
 
-            # Keep track of games with 0 time played
-            if not game_playtime:
-                total_unplayed_games += 1
+    return app_names
 
-            # Get completion data from HLTB API using compatible name
-            name_searchable = strip_trailing_edition(game_name)
-            name_searchable = strip_apostrophes(name_searchable)
-            search_data = api_search(name_searchable)
+# Resolve owned game to its Steam name and HLTB search data
+@timed_phase('resolve_library_game')
+def resolve_library_game(game: dict, game_name: str = None) -> tuple:
+    # Fallback to individual lookup when game was not resolved in bulk
+    if not game_name:
+        game_name = app_id_lookup(game['appid'])
 
-            if search_data == ERR_HLTB_NO_DATA:
-                error_count += 1
-                continue
+    # Skip HLTB search when Steam lookup failed or game is a different type of application
+    if not game_name or game_name == ERR_STEAM_GAME_REMOVED or game_name == ERR_STEAM_TYPE_APP:
+        return (game_name, None)
 
-            # Output individual game data
-            story_duration = format_half_hours(search_data['comp_main'])
-            sides_duration = format_half_hours(search_data['comp_plus'])
-            compl_duration = format_half_hours(search_data['comp_100'])
-            style_duration = format_half_hours(search_data['comp_all'])
-
-            if type(story_duration) == float:
-                story_dur_total += story_duration
-            if type(sides_duration) == float:
-                sides_dur_total += sides_duration
-            if type(compl_duration) == float:
-                compl_dur_total += compl_duration
-            if type(style_duration) == float:
-                style_dur_total += style_duration
-
-            output = get_printable_game_data(
-                game_name = game_name,
-                game_suffix = '(Currently played {0})'.format(append_hours(format_dec_hours(game_playtime))),
-                story_duration = story_duration,
-                sides_duration = sides_duration,
-                compl_duration = compl_duration,
-                style_duration = style_duration,
-            )
+    return (game_name, search_steam_name(game_name, game['appid']))
 
-            print(colourise(output))
+# Get completion data for Steam game, consulting local title index before HLTB API
+def search_steam_name(game_name: str, app_id: int = None) -> dict:
+    entry = get_mapped_title(app_id) if app_id else None
 
-        # Output aggregated library data
+    if entry:
+        increment_metric('title_index.mapped')
+        return entry
 
-        total_output = get_printable_game_data(
-            game_prefix = 'Total time to get through Steam library backlog',
-            story_duration = story_dur_total,
-            sides_duration = sides_dur_total,
-            compl_duration = compl_dur_total,
-            style_duration = style_dur_total,
-        )
+    entry = find_title_match(game_name)
 
-        print(colourise(total_output))
+    if entry:
+        increment_metric('title_index.hit')
+    else:
+        increment_metric('title_index.miss')
+        entry = api_match_search(game_name)
 
-        print(
-            colourise(
-                '''You have played these games on Steam for a total of {hours}!
-                But {unplayed} of these games you have never played before!'''.format(
-                    hours = append_hours(format_dec_hours(total_playtime)),
-                    unplayed = total_unplayed_games,
-                )
-            )
-        )
+        if not type(entry) == dict:
+            return entry
 
-        if error_count:
-            print(
-                colourise(
-                    '''An error occured when looking up {errors} of your games and have been ommitted from the list.
-                    This is likely because it has been removed from the Steam store.
-                    Or it could not be found by HowLongToBeat's search.'''.format(errors = error_count)
-                )
-            )
+    if app_id:
+        map_steam_title(app_id, entry)
 
-        if app_count:
-            print(
-                colourise(
-                    '''{apps} games in your library are other types of applications and have been ommitted from the list.
-                    These are likely utility, productivity or art apps like Wallpaper Engine, Aesprite or Blender.'''.format(apps = app_count)
-                )
-            )
-    except HTTPError as e:
-        handle_http_error(e)
+    return entry
 
-    main()
+# Read HLTB entries from JSON, NDJSON or CSV dump, JSON may be a list of entries or a search response
+def load_entry_file(path: str) -> list:
+    with open(path, newline = '', encoding = 'utf-8') as entry_file:
+        if path.lower().endswith('.csv'):
+            entries = list(csv.DictReader(entry_file))
+        elif path.lower().endswith(('.ndjson', '.jsonl')):
+            entries = [json.loads(line) for line in entry_file if line.strip()]
+        else:
+            entries = json.load(entry_file)
 
-# Output remaining time left on most recently played Steam game
-def steam_recently_played():
-    global colour_prefix
-    colour_prefix = colours.GREY
+    if type(entries) == dict:
+        entries = entries.get('data', [])
 
-    global steam_api_key
-    global steam_user_id
-    get_steam_details()
+    if not type(entries) == list:
+        raise ValueError('expected a list of entries')
 
-    # Create request to API endpoint for most recently played game
-    recent_url = '{base}?key={key}&steamid={id}&count=1'.format(
-        base = STEAM_REC_URL,
-        key = steam_api_key,
-        id = steam_user_id,
-    )
+    return entries
 
-    recent_headers = get_http_headers(True)
+# Convert dump entry value to whole number, 0 when value is missing or not a number (e.g. 'N/A' or a date)
+def get_dump_number(value) -> int:
+    try:
+        return int(float(value or 0))
+    except (ValueError, TypeError, OverflowError):
+        return 0
 
-    response = requests.get(
-        url = recent_url,
-        headers = recent_headers,
-    )
+# Convert dump entry to title index entry, None when entry has no ID or name
+def get_dump_entry(entry: dict) -> dict | None:
+    if not type(entry) == dict:
+        return None
 
     try:
-        # Parse request response
-        response.raise_for_status()
-        data = json.loads(response.text)['response']
+        game_id = int(entry.get('game_id') or 0)
+    except (ValueError, TypeError):
+        return None
 
-        if not data:
-            print(colourise('No data returned from Steam. Please check the visibility of your user profile.'))
-            steam_api_key = ''
-            steam_user_id = ''
-            main()
+    if not game_id or not entry.get('game_name'):
+        return None
 
-        if not data['total_count']:
-            print(colourise('You have not played any games within the last 2 weeks... :('))
-            main()
+    # CSV values are strings, durations are whole seconds
+    dump_entry = {field: entry.get(field) for field in HLTB_ENTRY_FIELDS}
+    dump_entry['game_id'] = game_id
 
-        game_data = data['games'][0]
-        game_name = game_data['name']
-        total_playtime = game_data['playtime_forever']
-        recent_playtime = game_data['playtime_2weeks']
+    for field in ['comp_main', 'comp_plus', 'comp_100', 'comp_all', 'release_world', 'invested_co', 'invested_mp']:
+        dump_entry[field] = get_dump_number(dump_entry[field])
 
-        # Get completion data from HLTB API using compatible name
-        name_searchable = strip_trailing_edition(game_name)
-        name_searchable = strip_apostrophes(name_searchable)
-        search_data = api_search(name_searchable)
+    return dump_entry
 
-        if search_data == ERR_HLTB_NO_DATA:
-            print(colourise('No HLTB data was found for this game.'))
-            main()
-
-        # Prepare HLTB completion data for output
-        story_duration = format_half_hours(search_data['comp_main'])
-        sides_duration = format_half_hours(search_data['comp_plus'])
-        compl_duration = format_half_hours(search_data['comp_100'])
-        style_duration = format_half_hours(search_data['comp_all'])
-
-        output = get_printable_game_data(
-            game_prefix = 'You most recently played - ',
-            game_name = game_name,
-            story_duration = story_duration,
-            sides_duration = sides_duration,
-            compl_duration = compl_duration,
-            style_duration = style_duration,
+# Request pages of all HLTB entries from the search API, an empty search lists every game
+def crawl_hltb_entries(page_size: int, max_pages: int = None):
+    search_headers = get_http_headers(True)
+    page = 1
+
+    while not max_pages or page <= max_pages:
+        response = http_post(
+            url = HLTB_SEARCH_URL,
+            data = get_search_body([''], page, page_size),
+            headers = search_headers,
         )
 
-        print(colourise(output))
+        response.raise_for_status()
+        entries = decode_search_entries(response.text)
 
-        print(
-            colourise(
-                'You have played {total} in total ({recent} in the past 2 weeks).'.format(
-                    total = append_hours(format_dec_hours(total_playtime)),
-                    recent = append_hours(format_dec_hours(recent_playtime)),
-                )
-            )
-        )
-    except HTTPError as e:
-        handle_http_error(e)
+        if not entries:
+            return
 
-    main()
+        yield entries
 
-# Output game completion data from search term
-def search_name(game_name: str = ''):
-    global colour_prefix
-    colour_prefix = colours.BLUE
+        if page >= (decode_search_page_total(response.text) or page):
+            return
 
-    search_term = input(colourise('Enter game name or search phrase...')).strip().lower()
+        page += 1
 
-    data = api_search(search_term)
+# Add HLTB entries to title index in batches, returning numbers of entries added and skipped
+def warm_title_index(entries) -> tuple:
+    entry_count = 0
+    skipped_count = 0
+    batch = []
 
-    if data == ERR_HLTB_NO_DATA:
-        print(colourise('No matches returned for this query. Try to match the game name.'))
-        search_name()
+    for entry in entries:
+        entry = get_dump_entry(entry)
 
-    game_name = data['game_name']
-    story_duration = format_half_hours(data['comp_main'])
-    sides_duration = format_half_hours(data['comp_plus'])
-    compl_duration = format_half_hours(data['comp_100'])
-    style_duration = format_half_hours(data['comp_all'])
-
-    output = get_printable_game_data(
-        game_prefix = 'Most relevant result for ',
-        game_name = game_name,
-        story_duration = story_duration,
-        sides_duration = sides_duration,
-        compl_duration = compl_duration,
-        style_duration = style_duration,
-    )
+        if not entry:
+            skipped_count += 1
+            continue
 
-    print(colourise(output))
+        batch.append(entry)
 
-    main()
+        if len(batch) >= WARMUP_BATCH_SIZE:
+            add_to_title_index(batch)
+            entry_count += len(batch)
+            batch = []
 
-# Output game completion data from identifier
-def get_by_id(is_steam_id: bool = False):
-    global colour_prefix
-    colour_prefix = colours.MAGENTA
+    add_to_title_index(batch)
 
-    id_type = 'Steam' if is_steam_id else 'HLTB'
-    game_id = input(colourise('Enter {service} game ID...').format(service = id_type)).strip()
+    return entry_count + len(batch), skipped_count
 
-    if not game_id.isdigit():
-        print(colourise('Invalid ID. Must be an integer.'))
-        get_by_id(is_steam_id)
+# Count failed lookups by cause for metrics, returning result unchanged
+def count_result_status(result: GameResult) -> GameResult:
+    if not result.status == GameStatus.OK:
+        increment_metric('errors.{0}'.format(result.status.value))
 
-    # Different lookup service required, HLTB does not natively support Steam app IDs
-    if is_steam_id:
-        game_name = app_id_lookup(game_id)
+    return result
 
-        if game_name == ERR_STEAM_GAME_REMOVED or game_name == ERR_STEAM_TYPE_APP:
-            print(
-                colourise(
-                    'Unable to find data for this Steam ID, please ensure it is valid/still present on the Steam storefront.'
-                )
+# Format seconds to half hours for records, None when there is no data
+def get_record_hours(seconds: int) -> float | None:
+    if not seconds:
+        return None
+
+    return format_half_hours(seconds)
+
+# Parse HLTB game page duration (e.g. '12.5 Hours' or '45 Mins') to seconds, 0 when there is no data
+def parse_hltb_seconds(time_amount: str) -> int:
+    amount = time_amount.split(' ')[0]
+
+    try:
+        amount = float(amount)
+    except ValueError:
+        return 0
+
+    if 'MIN' in time_amount.upper():
+        return round(amount * 60)
+
+    return round(amount * 3600)
+
+# Resolved game lookup, records are only built from results as they are written out
+# Durations are whole seconds as given by HLTB, 0 where there is no data
+class GameResult:
+    __slots__ = ['status', 'app_id', 'hltb_id', 'name', 'playtime_minutes'] + DURATION_FIELDS + ['page_times']
+
+    def __init__(
+        self,
+        status: GameStatus,
+        app_id: int = None,
+        hltb_id: int = None,
+        name: str = None,
+        playtime_minutes: int = None,
+        main_story: int = 0,
+        main_sides: int = 0,
+        completionist: int = 0,
+        all_styles: int = 0,
+        page_times: list = None,
+    ):
+        self.status = status
+        self.app_id = app_id
+        self.hltb_id = hltb_id
+        self.name = name
+        self.playtime_minutes = playtime_minutes
+        self.main_story = main_story
+        self.main_sides = main_sides
+        self.completionist = completionist
+        self.all_styles = all_styles
+
+        # Completion types and seconds as listed on HLTB game page, e.g. multiplayer games list Co-Op/Vs. times
+        self.page_times = page_times
+
+    def __repr__(self) -> str:
+        return 'GameResult({0})'.format(', '.join('{0}={1!r}'.format(slot, getattr(self, slot)) for slot in self.__slots__))
+
+    # Rebuild result from game record, e.g. from a library snapshot
+    # Snapshots saved by older versions only have durations in rounded hours
+    @classmethod
+    def from_record(cls, record: dict) -> GameResult:
+        if 'seconds' in record:
+            durations = record['seconds']
+        else:
+            durations = {
+                field: round(record[field] * 3600) if record.get(field) is not None else 0
+                for field in DURATION_FIELDS
+            }
+
+        return cls(
+            GameStatus(record['status']),
+            app_id = record.get('app_id'),
+            hltb_id = record.get('hltb_id'),
+            name = record['name'],
+            playtime_minutes = record.get('playtime_minutes'),
+            **durations,
+        )
+
+    # Get copy of result with another playtime, e.g. for each owner of a shared game
+    def with_playtime(self, playtime_minutes: int) -> GameResult:
+        return GameResult(
+            self.status,
+            self.app_id,
+            self.hltb_id,
+            self.name,
+            playtime_minutes,
+            self.main_story,
+            self.main_sides,
+            self.completionist,
+            self.all_styles,
+            self.page_times,
+        )
+
+    # Get duration for field in half hours, None when there is no data
+    def get_hours(self, field: str) -> float | None:
+        return get_record_hours(getattr(self, field))
+
+    # Build game record for output, additional fields are included as given
+    def to_record(self, source: str, **fields) -> dict:
+        record = {
+            'record': RECORD_GAME,
+            'source': source,
+            'name': self.name,
+            'status': self.status.value,
+        }
+
+        if self.app_id is not None:
+            record['app_id'] = self.app_id
+
+        if self.playtime_minutes is not None:
+            record['playtime_minutes'] = self.playtime_minutes
+
+        record.update(fields)
+
+        if self.hltb_id is not None:
+            record['hltb_id'] = self.hltb_id
+
+        if not self.status == GameStatus.OK:
+            return record
+
+        # HLTB game pages list completion times as shown on the page
+        if source == SOURCE_HLTB_ID:
+            page_times = self.page_times
+
+            if page_times is None:
+                page_times = [[time_type, getattr(self, field)] for time_type, field in HLTB_TIME_FIELDS.items()]
+
+            record['times'] = [[time_type, format_page_time(seconds)] for time_type, seconds in page_times]
+
+        for field in DURATION_FIELDS:
+            record[field] = self.get_hours(field)
+
+        return record
+
+# Resolve game result from its name and HLTB data, shared by every type of lookup
+# Name may instead be a Steam lookup error, search data is a HLTB entry or error
+def resolve_game_result(
+    game_name: str,
+    search_data: dict | str,
+    app_id: int = None,
+    playtime_minutes: int = None,
+    hltb_id: int = None,
+) -> GameResult:
+    # Steam lookup found game is removed or a different type of application
+    if game_name == ERR_STEAM_GAME_REMOVED or game_name == ERR_STEAM_TYPE_APP:
+        return GameResult(GameStatus(game_name), app_id, hltb_id, None, playtime_minutes)
+
+    if not search_data:
+        return GameResult(GameStatus.ERR_HTTP, app_id, hltb_id, game_name or None, playtime_minutes)
+
+    if search_data == ERR_HLTB_NO_DATA:
+        return GameResult(GameStatus.ERR_HLTB_NO_DATA, app_id, hltb_id, game_name, playtime_minutes)
+
+    return GameResult(
+        GameStatus.OK,
+        app_id,
+        search_data['game_id'],
+        game_name,
+        playtime_minutes,
+        search_data['comp_main'] or 0,
+        search_data['comp_plus'] or 0,
+        search_data['comp_100'] or 0,
+        search_data['comp_all'] or 0,
+    )
+
+# Create empty running library totals record
+def new_library_totals(game_count: int) -> dict:
+    totals = {
+        'record': RECORD_TOTALS,
+        'source': SOURCE_LIBRARY,
+        'game_count': game_count,
+        'playtime_minutes': 0,
+        'unplayed_games': 0,
+        'error_count': 0,
+        'app_count': 0,
+    }
+
+    for field in DURATION_FIELDS:
+        totals[field] = 0
+
+    return totals
+
+# Columnar store of resolved library games, typed arrays keep large libraries compact
+class LibraryTable:
+    def __init__(self, game_count: int):
+        self.game_count = game_count
+        self.app_ids = array('q')
+        self.hltb_ids = array('q')
+        self.names = []
+        self.playtimes = array('q')
+
+        # Games with a name that are not other types of applications count towards playtime
+        self.counted = bytearray()
+        self.found = bytearray()
+        self.app_count = 0
+
+        # Durations are 0 where missing, present masks mark games with data
+        self.durations = {field: array('d') for field in DURATION_FIELDS}
+        self.present = {field: bytearray() for field in DURATION_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.app_ids)
+
+    # Add library game result as a new row
+    def append(self, result: GameResult):
+        is_app = result.status == GameStatus.ERR_STEAM_TYPE_APP
+        is_found = result.status == GameStatus.OK
+
+        self.app_ids.append(result.app_id or 0)
+        self.hltb_ids.append(result.hltb_id or 0)
+        self.names.append(result.name)
+        self.playtimes.append(result.playtime_minutes or 0)
+        self.counted.append(bool(result.name) and not is_app)
+        self.found.append(is_found)
+        self.app_count += is_app
+
+        for field in DURATION_FIELDS:
+            hours = result.get_hours(field) if is_found else None
+            self.durations[field].append(hours or 0)
+            self.present[field].append(hours is not None)
+
+    # Get durations of games with data for field
+    def get_present_durations(self, field: str) -> list:
+        return list(compress(self.durations[field], self.present[field]))
+
+    # Get duration percentile for field by nearest rank, None when no games have data
+    def get_percentile(self, field: str, percentile: float) -> float | None:
+        values = sorted(self.get_present_durations(field))
+
+        if not values:
+            return None
+
+        return values[max(0, math.ceil(len(values) * percentile) - 1)]
+
+    # Get hours left to complete row for duration field, estimate less time already played
+    def get_remaining(self, row: int, field: str) -> float:
+        return max(0.0, round(self.durations[field][row] - self.playtimes[row] / 60, 1))
+
+    # Build game record for row, with remaining hours for duration field
+    def get_row_record(self, row: int, field: str) -> dict:
+        record = {
+            'record': RECORD_GAME,
+            'source': SOURCE_QUERY,
+            'app_id': self.app_ids[row],
+            'hltb_id': self.hltb_ids[row],
+            'name': self.names[row],
+            'status': STATUS_OK,
+            'playtime_minutes': self.playtimes[row],
+            'remaining_hours': self.get_remaining(row, field),
+        }
+
+        for duration_field in DURATION_FIELDS:
+            record[duration_field] = self.durations[duration_field][row] if self.present[duration_field][row] else None
+
+        return record
+
+    # Aggregate rows to library totals record
+    def get_totals(self) -> dict:
+        counted_playtimes = list(compress(self.playtimes, self.counted))
+
+        totals = {
+            'record': RECORD_TOTALS,
+            'source': SOURCE_LIBRARY,
+            'game_count': self.game_count,
+            'playtime_minutes': sum(counted_playtimes),
+            'unplayed_games': counted_playtimes.count(0),
+            'error_count': len(self) - self.found.count(1) - self.app_count,
+            'app_count': self.app_count,
+        }
+
+        for field in DURATION_FIELDS:
+            totals[field] = sum(self.get_present_durations(field))
+
+        totals['percentiles'] = {
+            field: {
+                'p{0:g}'.format(percentile * 100): self.get_percentile(field, percentile)
+                for percentile in LIBRARY_PERCENTILES
+            }
+            for field in DURATION_FIELDS
+        }
+
+        return totals
+
+# Find library rows with data for duration field matching filters, hours are inclusive bounds
+def query_library(
+    table: LibraryTable,
+    field: str,
+    min_playtime: float = None,
+    max_playtime: float = None,
+    min_remaining: float = None,
+    max_remaining: float = None,
+    limit: int = None,
+    is_longest: bool = False,
+) -> list:
+    rows = compress(range(len(table)), table.present[field])
+
+    if min_playtime is not None:
+        rows = (row for row in rows if table.playtimes[row] >= min_playtime * 60)
+
+    if max_playtime is not None:
+        rows = (row for row in rows if table.playtimes[row] <= max_playtime * 60)
+
+    if min_remaining is not None:
+        rows = (row for row in rows if table.get_remaining(row, field) >= min_remaining)
+
+    if max_remaining is not None:
+        rows = (row for row in rows if table.get_remaining(row, field) <= max_remaining)
+
+    if limit is None:
+        return list(rows)
+
+    # Only the requested number of rows are kept in the heap, rather than sorting every match
+    select = heapq.nlargest if is_longest else heapq.nsmallest
+
+    return select(limit, rows, key = lambda row: table.get_remaining(row, field))
+
+# Add library game result to running totals
+def add_to_library_totals(totals: dict, result: GameResult):
+    # Game is a different type of application (e.g. art program like Aesprite or Blender)
+    if result.status == GameStatus.ERR_STEAM_TYPE_APP:
+        totals['app_count'] += 1
+        return
+
+    # Error getting game name from Steam lookup
+    if not result.name:
+        totals['error_count'] += 1
+        return
+
+    totals['playtime_minutes'] += result.playtime_minutes
+
+    # Keep track of games with 0 time played
+    if not result.playtime_minutes:
+        totals['unplayed_games'] += 1
+
+    if not result.status == GameStatus.OK:
+        totals['error_count'] += 1
+        return
+
+    for field in DURATION_FIELDS:
+        if getattr(result, field):
+            totals[field] += result.get_hours(field)
+
+# Request owned games for Steam user, empty when profile data is not visible
+@timed_phase('fetch_library')
+def fetch_owned_games(user_id: str = None) -> dict:
+    # Create request to API endpoint for all user's games
+    user_library_url = '{base}?key={key}&steamid={id}&include_appinfo=1'.format(
+        base = STEAM_LIB_URL,
+        key = steam_api_key,
+        id = user_id or steam_user_id,
+    )
+
+    library_headers = get_http_headers(True)
+
+    response = http_get(
+        url = user_library_url,
+        headers = library_headers,
+    )
+
+    # Parse request response
+    response.raise_for_status()
+
+    return json.loads(response.text)['response']
+
+# Request most recently played game for Steam user, empty when profile data is not visible
+@timed_phase('fetch_recent')
+def fetch_recent_games() -> dict:
+    # Create request to API endpoint for most recently played game
+    recent_url = '{base}?key={key}&steamid={id}&count=1'.format(
+        base = STEAM_REC_URL,
+        key = steam_api_key,
+        id = steam_user_id,
+    )
+
+    recent_headers = get_http_headers(True)
+
+    response = http_get(
+        url = recent_url,
+        headers = recent_headers,
+    )
+
+    # Parse request response
+    response.raise_for_status()
+
+    return json.loads(response.text)['response']
+
+# Filter owned games, only interested in games with no playtime in backlog mode
+def filter_library_games(data: dict, is_backlog: bool) -> list:
+    return [game for game in data.get('games', []) if not (is_backlog and game['playtime_forever'])]
+
+# Map function over items concurrently, yielding results in order with bounded in-flight work
+def bounded_ordered_map(executor: ThreadPoolExecutor, fn, items, window: int):
+    pending = deque()
+
+    for item in items:
+        pending.append(executor.submit(fn, *item))
+
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+# Yield owned games with names resolved in batches, only as the next batch is required
+def iter_named_games(games_list: list):
+    for i in range(0, len(games_list), STEAM_ITEMS_BATCH_SIZE):
+        batch = games_list[i:i + STEAM_ITEMS_BATCH_SIZE]
+
+        app_names = bulk_app_lookup(
+            [game['appid'] for game in batch],
+            {game['appid']: game.get('name') for game in batch},
+        )
+
+        for game in batch:
+            yield (game, app_names.get(game['appid']))
+
+# Resolve owned games concurrently, yielding game results in library order as they are ready
+def iter_library_results(games_list: list, worker_count: int = DEFAULT_WORKER_COUNT):
+    worker_count = max(1, worker_count)
+
+    with ThreadPoolExecutor(max_workers = worker_count) as executor:
+        resolved_games = bounded_ordered_map(
+            executor,
+            resolve_library_game,
+            iter_named_games(games_list),
+            worker_count * WORKER_QUEUE_FACTOR,
+        )
+
+        for game, (game_name, search_data) in zip(games_list, resolved_games):
+            result = resolve_game_result(
+                game_name,
+                search_data,
+                app_id = game['appid'],
+                playtime_minutes = game['playtime_forever'],
             )
-            get_by_id(is_steam_id)
-
-        name_searchable = strip_trailing_edition(game_name)
-        name_searchable = strip_apostrophes(name_searchable)
-        data = api_search(name_searchable)
-
-        if data == ERR_HLTB_NO_DATA:
-            print(colourise('Unable to find HLTB data for this Steam ID, please ensure it is valid.'))
-            get_by_id(is_steam_id)
-
-        # Output HLTB data from search API response
-        story_duration = format_half_hours(data['comp_main'])
-        sides_duration = format_half_hours(data['comp_plus'])
-        compl_duration = format_half_hours(data['comp_100'])
-        style_duration = format_half_hours(data['comp_all'])
-
-        output = get_printable_game_data(
-            game_prefix = 'Game completion times for ',
-            game_name = game_name,
-            story_duration = story_duration,
-            sides_duration = sides_duration,
-            compl_duration = compl_duration,
-            style_duration = style_duration,
+
+            yield count_result_status(result)
+
+# Check snapshot result is still valid for owned game, failed lookups are always retried
+def is_snapshot_current(result: GameResult, game: dict) -> bool:
+    if not result or result.status == GameStatus.ERR_HTTP:
+        return False
+
+    return result.playtime_minutes == game['playtime_forever']
+
+# Resolve owned games, only re-resolving new/changed games since the last scan when syncing
+# Each resolved game is saved to the snapshot as a checkpoint, so interrupted scans can be resumed
+def sync_library_results(
+    data: dict,
+    is_backlog: bool,
+    worker_count: int = DEFAULT_WORKER_COUNT,
+    is_sync: bool = False,
+    is_resume: bool = False,
+):
+    user_id = steam_user_id
+    games_list = filter_library_games(data, is_backlog)
+    snapshot = {}
+    scan_started = time.time()
+
+    if is_sync and cache_enabled and not cache_refresh:
+        snapshot = load_library_snapshot(user_id)
+    elif is_resume and cache_enabled:
+        interrupted_scan = get_interrupted_scan(user_id)
+
+        if interrupted_scan is None:
+            print('No interrupted library scan to resume, starting from the first game.', file = sys.stderr)
+        else:
+            # Resumed scans keep their original start, so they can be resumed again
+            scan_started = interrupted_scan
+            snapshot = load_library_snapshot(user_id, interrupted_scan)
+            increment_metric('scan.resumed_games', len(snapshot))
+
+    if cache_enabled:
+        start_scan_progress(user_id, scan_started)
+
+    changed_games = [game for game in games_list if not is_snapshot_current(snapshot.get(game['appid']), game)]
+    resolved_results = iter_library_results(changed_games, worker_count)
+
+    # Merge unchanged and resolved results back into library order
+    for game in games_list:
+        snapshot_result = snapshot.get(game['appid'])
+
+        if is_snapshot_current(snapshot_result, game):
+            yield snapshot_result
+            continue
+
+        result = next(resolved_results)
+
+        if cache_enabled:
+            save_snapshot_result(user_id, result)
+
+        yield result
+
+    resolved_results.close()
+
+    if cache_enabled:
+        remove_stale_snapshot_games(user_id, {game['appid'] for game in data.get('games', [])})
+        complete_scan_progress(user_id)
+
+# Build library table for queries, offline tables are read from the last scan without contacting Steam
+def load_query_table(is_backlog: bool, worker_count: int = DEFAULT_WORKER_COUNT, is_offline: bool = False) -> LibraryTable | None:
+    if is_offline:
+        snapshot = load_library_snapshot(steam_user_id)
+
+        if not snapshot:
+            print('No saved library scan for {0}, run the backlog command first.'.format(steam_user_id), file = sys.stderr)
+            return None
+
+        table = LibraryTable(len(snapshot))
+        results = (
+            result for result in snapshot.values()
+            if not (is_backlog and result.playtime_minutes)
         )
+    else:
+        data = fetch_owned_games()
+
+        if not data:
+            print('No data returned from Steam. Please check the visibility of your user profile.', file = sys.stderr)
+            return None
+
+        # Only games changed since the last scan are looked up again
+        table = LibraryTable(data['game_count'])
+        results = sync_library_results(data, is_backlog, worker_count, True)
+
+    for result in results:
+        table.append(result)
+
+    return table
+
+# Request owned games for many Steam users concurrently, users with errors/hidden profiles are omitted
+def fetch_user_libraries(user_ids: list, worker_count: int = DEFAULT_WORKER_COUNT) -> dict:
+    libraries = {}
+
+    with ThreadPoolExecutor(max_workers = max(1, min(worker_count, len(user_ids)))) as executor:
+        futures = [(user_id, executor.submit(fetch_owned_games, user_id)) for user_id in user_ids]
+
+        for user_id, future in futures:
+            try:
+                data = future.result()
+            except HTTPError as e:
+                handle_http_error(e)
+                continue
+
+            if not data:
+                print(
+                    'No data returned from Steam for {0}. Please check the visibility of the user profile.'.format(user_id),
+                    file = sys.stderr,
+                )
+                continue
+
+            libraries[user_id] = data
+
+    return libraries
+
+# Resolve libraries of many Steam users, each unique game is looked up once
+def iter_multi_user_records(user_ids: list, is_backlog: bool, worker_count: int = DEFAULT_WORKER_COUNT):
+    libraries = fetch_user_libraries(user_ids, worker_count)
 
-        print(colourise(output))
+    unique_games = {}
+    owners = {}
+    user_tables = {}
 
-        # Early return to main function
-        main()
+    for user_id, data in libraries.items():
+        user_tables[user_id] = LibraryTable(data['game_count'])
+
+        for game in filter_library_games(data, is_backlog):
+            unique_games.setdefault(game['appid'], game)
+            owners.setdefault(game['appid'], []).append((user_id, game['playtime_forever']))
+
+    combined_table = LibraryTable(sum(data['game_count'] for data in libraries.values()))
+
+    for result in iter_library_results(list(unique_games.values()), worker_count):
+        game_owners = owners[result.app_id]
+
+        # Each owner's totals use their own playtime for the shared lookup
+        for user_id, playtime in game_owners:
+            user_result = result.with_playtime(playtime)
+            user_tables[user_id].append(user_result)
+            combined_table.append(user_result)
+
+        yield result.with_playtime(sum(playtime for _, playtime in game_owners)).to_record(
+            SOURCE_LIBRARY,
+            owner_count = len(game_owners),
+        )
+
+    for user_id, table in user_tables.items():
+        yield table.get_totals() | {'steam_user_id': user_id}
+
+    yield combined_table.get_totals() | {
+        'record': RECORD_COMBINED_TOTALS,
+        'user_count': len(libraries),
+        'unique_games': len(unique_games),
+    }
+
+# Resolve most recently played game
+def get_recent_result(game_data: dict) -> GameResult:
+    result = resolve_game_result(
+        game_data['name'],
+        search_steam_name(game_data['name'], game_data['appid']),
+        app_id = game_data['appid'],
+        playtime_minutes = game_data['playtime_forever'],
+    )
+
+    return count_result_status(result)
+
+# Resolve most relevant HLTB search result
+def get_search_result(search_term: str) -> GameResult:
+    search_data = find_title_match(search_term)
+
+    if search_data:
+        increment_metric('title_index.hit')
+    else:
+        increment_metric('title_index.miss')
+        search_data = api_search(search_term)
+
+        if type(search_data) == dict:
+            add_to_title_index([search_data])
+
+    game_name = search_data['game_name'] if type(search_data) == dict else None
+
+    return count_result_status(resolve_game_result(game_name, search_data))
+
+# Resolve Steam app ID, HLTB does not natively support Steam app IDs
+def get_steam_id_result(app_id: int) -> GameResult:
+    game_name = app_id_lookup(app_id)
+    search_data = None
+
+    if game_name and not game_name == ERR_STEAM_GAME_REMOVED and not game_name == ERR_STEAM_TYPE_APP:
+        search_data = search_steam_name(game_name, app_id)
+
+    return count_result_status(resolve_game_result(game_name, search_data, app_id = int(app_id)))
+
+# Format seconds as HLTB game page duration, e.g. '12.5 Hours' or '45 Mins'
+def format_page_time(seconds: int) -> str:
+    if not seconds:
+        return 'No Data'
+
+    if seconds < 3600:
+        return '{0} Mins'.format(round(seconds / 60))
+
+    return '{0:g} Hours'.format(format_half_hours(seconds))
+
+# Get game data embedded in HLTB game page, None when page has no usable data
+def get_page_game_data(html: str) -> dict | None:
+    match = HLTB_PAGE_DATA_PATTERN.search(html)
+
+    if not match:
+        return None
+
+    try:
+        return json.loads(match.group(1))['props']['pageProps']['game']['data']['game'][0]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+# Get completion types and seconds listed on HLTB game page from its entry
+# Multiplayer only games (no single player times) only list their multiplayer times
+def get_page_times(entry: dict) -> list:
+    page_times = [[time_type, entry.get(field) or 0] for time_type, field in HLTB_PAGE_TIME_FIELDS.items()]
+    multiplayer_times = [
+        [time_type, entry[field]] for time_type, field in HLTB_PAGE_MULTIPLAYER_FIELDS.items()
+        if entry.get(field)
+    ]
+
+    if multiplayer_times and not any(seconds for _, seconds in page_times):
+        return multiplayer_times
+
+    return page_times + multiplayer_times
+
+# Get HLTB entry and listed completion times from page HTML, used when page has no embedded data
+def get_page_html_entry(game_id: int, html: str) -> tuple:
+    # Only pages without embedded data need an HTML parser
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, HLTB_PAGE_PARSER)
+
+    # Get game name from HTML
+    game_name_selector = 'div[class^="GameHeader_profile_header"]'
+    entry = {
+        'game_id': int(game_id),
+        'game_name': soup.select_one(game_name_selector + '>' + game_name_selector).text,
+    }
+
+    for field in HLTB_PAGE_TIME_FIELDS.values():
+        entry[field] = 0
+
+    page_times = []
+
+    # Get every listed completion type and duration, including multiplayer types that have no record field
+    for time_type in soup.select('li[class^="GameStats"] > h4'):
+        time_amount = time_type.find_next_sibling('h5').text.replace('\u00BD', '.5')
+        seconds = parse_hltb_seconds(time_amount)
+        page_times.append([time_type.text, seconds])
+
+        if time_type.text in HLTB_PAGE_TIME_FIELDS:
+            entry[HLTB_PAGE_TIME_FIELDS[time_type.text]] = seconds
+
+    return entry, page_times
+
+# Extract HLTB entry and listed completion times from game page, along with whether they came from the embedded data
+# Has no side effects, so can run in a page parsing process
+def extract_hltb_game_page(game_id: int, html: str) -> tuple:
+    game_data = get_page_game_data(html)
+
+    if game_data:
+        entry = get_hltb_entry(game_data)
+
+        return entry, get_page_times(entry), True
+
+    return get_page_html_entry(game_id, html) + (False,)
+
+# Resolve HLTB game page, preferring embedded data over the HTML tree
+@timed_phase('hltb_page_parse')
+def parse_hltb_game_page(game_id: int, html: str) -> GameResult:
+    if page_parse_executor:
+        entry, page_times, is_embedded = page_parse_executor.submit(extract_hltb_game_page, game_id, html).result()
+    else:
+        entry, page_times, is_embedded = extract_hltb_game_page(game_id, html)
+
+    if is_embedded:
+        # Page data has the same fields as search results, so can be reused by title lookups
+        add_to_title_index([entry])
+    else:
+        increment_metric('hltb_page.html_fallback')
+
+    result = resolve_game_result(entry['game_name'].strip(), entry)
+    result.page_times = page_times
+
+    return result
+
+# Resolve HLTB game ID from its game page
+@single_flight(SOURCE_HLTB_ID)
+@timed_phase('hltb_game_page')
+def get_hltb_id_result(game_id: int) -> GameResult:
+    # Indexed entries have the same data as the game page
+    entry = get_indexed_entry(game_id)
+
+    if entry:
+        increment_metric('title_index.id_hit')
+        result = resolve_game_result(entry['game_name'].strip(), entry)
+        result.page_times = get_page_times(entry)
+
+        return result
 
     # Set required request headers
     id_headers = get_http_headers(False)
 
-    response = requests.get(
+    response = http_get(
         url = '{path}{id}'.format(path = HLTB_ID_URL, id = game_id),
         headers = id_headers,
     )
 
+    # Parse request response
+    response.raise_for_status()
+
+    return parse_hltb_game_page(game_id, response.text)
+
+# Resolve HLTB game ID, failed requests give an error result instead of raising
+def try_hltb_id_result(game_id: int) -> GameResult:
     try:
-        # Parse request response
-        response.raise_for_status()
-        html = response.text
-        soup = BeautifulSoup(html, 'html.parser')
-        output = ''
+        return get_hltb_id_result(game_id)
+    except HTTPError as e:
+        # Reported without changing output colour, as other records are still to follow
+        print(
+            'Unable to fetch HLTB game {id}: {status} {reason}'.format(
+                id = game_id,
+                status = e.response.status_code,
+                reason = e.response.reason,
+            ),
+            file = sys.stderr,
+        )
+    except (RequestConnectionError, Timeout) as e:
+        # Requests are already retried, so the page is unreachable for now
+        print('Unable to fetch HLTB game {id}: {error}'.format(id = game_id, error = type(e).__name__), file = sys.stderr)
+
+    return count_result_status(resolve_game_result(None, None, hltb_id = int(game_id)))
+
+# Look up many HLTB (or Steam) IDs concurrently, yielding results in the given order
+# HLTB pages are parsed in a pool of processes when process count is given, fetching stays in threads
+def iter_id_results(
+    game_ids: list,
+    is_steam_id: bool = False,
+    worker_count: int = DEFAULT_WORKER_COUNT,
+    process_count: int = 0,
+):
+    if process_count and not is_steam_id:
+        yield from iter_process_id_results(game_ids, worker_count, process_count)
+        return
+
+    worker_count = max(1, worker_count)
+    lookup = get_steam_id_result if is_steam_id else try_hltb_id_result
+
+    with ThreadPoolExecutor(max_workers = worker_count) as executor:
+        yield from bounded_ordered_map(
+            executor,
+            lookup,
+            ((game_id,) for game_id in game_ids),
+            worker_count * WORKER_QUEUE_FACTOR,
+        )
+
+# Look up many HLTB IDs concurrently, handing fetched pages to a process pool for parsing
+def iter_process_id_results(game_ids: list, worker_count: int, process_count: int):
+    global page_parse_executor
+
+    # Process pool module imports multiprocessing, so is only loaded when used
+    # Spawned processes avoid forking while lookup threads are running
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers = process_count, mp_context = multiprocessing.get_context('spawn')) as executor:
+        page_parse_executor = executor
+
+        try:
+            yield from iter_id_results(game_ids, False, worker_count)
+        finally:
+            page_parse_executor = None
+
+# Get printable duration from record hours
+def get_printable_duration(hours: float | None) -> float | str:
+    if hours is None:
+        return 'No Data'
+
+    return hours
+
+# Get printable paragraphs for game or totals record
+def get_printable_record(record: dict) -> list:
+    if record['record'] == RECORD_TOTALS or record['record'] == RECORD_COMBINED_TOTALS:
+        return get_printable_totals(record)
+
+    # Running totals are only useful to machine-readable consumers
+    if record['record'] == RECORD_RUNNING_TOTALS:
+        return []
+
+    if not record['status'] == STATUS_OK:
+        # Library games with errors are summarised in totals instead
+        if record['source'] == SOURCE_LIBRARY:
+            return []
+
+        return [STATUS_MESSAGES[record['status']]]
+
+    # HLTB game pages provide their own completion types
+    if record['source'] == SOURCE_HLTB_ID:
+        output = 'Game completion times for {0}:\n'.format(record['name'])
+
+        for time_type, time_amount in record['times']:
+            output += '\t{0} - {1}\n'.format(time_type, time_amount)
+
+        return [output]
+
+    durations = {
+        'story_duration': get_printable_duration(record['main_story']),
+        'sides_duration': get_printable_duration(record['main_sides']),
+        'compl_duration': get_printable_duration(record['completionist']),
+        'style_duration': get_printable_duration(record['all_styles']),
+    }
+
+    if record['source'] == SOURCE_LIBRARY:
+        return [
+            get_printable_game_data(
+                game_name = record['name'],
+                game_suffix = '(Currently played {0})'.format(
+                    append_hours(format_dec_hours(record['playtime_minutes']))
+                ),
+                **durations,
+            )
+        ]
+
+    if record['source'] == SOURCE_QUERY:
+        return [
+            get_printable_game_data(
+                game_name = record['name'],
+                game_suffix = '(Currently played {played}, about {remaining} left)'.format(
+                    played = append_hours(format_dec_hours(record['playtime_minutes'])),
+                    remaining = append_hours(record['remaining_hours']),
+                ),
+                **durations,
+            )
+        ]
+
+    if record['source'] == SOURCE_RECENT:
+        return [
+            get_printable_game_data(
+                game_prefix = 'You most recently played - ',
+                game_name = record['name'],
+                **durations,
+            ),
+            'You have played {total} in total ({recent} in the past 2 weeks).'.format(
+                total = append_hours(format_dec_hours(record['playtime_minutes'])),
+                recent = append_hours(format_dec_hours(record['recent_playtime_minutes'])),
+            ),
+        ]
+
+    game_prefix = 'Most relevant result for ' if record['source'] == SOURCE_SEARCH else 'Game completion times for '
+
+    return [
+        get_printable_game_data(
+            game_prefix = game_prefix,
+            game_name = record['name'],
+            **durations,
+        )
+    ]
+
+# Get printable paragraphs for aggregated library totals
+def get_printable_totals(totals: dict) -> list:
+    game_prefix = 'Total time to get through Steam library backlog'
+
+    if totals['record'] == RECORD_COMBINED_TOTALS:
+        game_prefix = 'Total time to get through all {0} Steam library backlogs'.format(totals['user_count'])
+    elif totals.get('steam_user_id'):
+        game_prefix += ' for {0}'.format(totals['steam_user_id'])
+
+    output = [
+        get_printable_game_data(
+            game_prefix = game_prefix,
+            story_duration = totals['main_story'],
+            sides_duration = totals['main_sides'],
+            compl_duration = totals['completionist'],
+            style_duration = totals['all_styles'],
+        ),
+        '''You have played these games on Steam for a total of {hours}!
+        But {unplayed} of these games you have never played before!'''.format(
+            hours = append_hours(format_dec_hours(totals['playtime_minutes'])),
+            unplayed = totals['unplayed_games'],
+        ),
+    ]
+
+    if totals['error_count']:
+        output.append(
+            '''An error occured when looking up {errors} of your games and have been ommitted from the list.
+            This is likely because it has been removed from the Steam store.
+            Or it could not be found by HowLongToBeat's search.'''.format(errors = totals['error_count'])
+        )
+
+    if totals['app_count']:
+        output.append(
+            '''{apps} games in your library are other types of applications and have been ommitted from the list.
+            These are likely utility, productivity or art apps like Wallpaper Engine, Aesprite or Blender.'''.format(apps = totals['app_count'])
+        )
+
+    return output
+
+# Write records to output stream in desired format, streaming formats are flushed per record
+def write_records(records, output_format: str, stream = None):
+    stream = stream or sys.stdout
 
-        # Get game name from HTML
-        game_name_selector = 'div[class^="GameHeader_profile_header"]'
-        game_name = soup.select_one(game_name_selector + '>' + game_name_selector).text.strip()
-        output += 'Game completion times for {0}:\n'.format(game_name)
+    if output_format == OUTPUT_JSON:
+        json.dump(list(records), stream, indent = 2)
+        stream.write('\n')
+        return
 
-        # Get game completion type and duration
-        for time_type in soup.select('li[class^="GameStats"] > h4'):
-            time_amount = time_type.find_next_sibling('h5')
-            time_amount = time_amount.text.replace('\u00BD', '.5')
+    if output_format == OUTPUT_CSV:
+        writer = csv.DictWriter(stream, fieldnames = RECORD_FIELDS, extrasaction = 'ignore')
+        writer.writeheader()
 
-            if time_amount == '--':
-                time_amount = 'No Data'
+    for record in records:
+        if output_format == OUTPUT_NDJSON:
+            stream.write(json.dumps(record) + '\n')
+        elif output_format == OUTPUT_CSV:
+            writer.writerow(record)
+        else:
+            for paragraph in get_printable_record(record):
+                stream.write(colourise(paragraph) + '\n')
 
-            output += '\t{0} - {1}\n'.format(time_type.text, time_amount)
+        stream.flush()
 
-        print(colourise(output))
+# Output game completion data from Steam library
+def steam_library(
+    is_backlog: bool = False,
+    worker_count: int = DEFAULT_WORKER_COUNT,
+    is_sync: bool = False,
+    is_resume: bool = False,
+):
+    global colour_prefix
+    colour_prefix = colours.CYAN
+
+    global steam_api_key
+    global steam_user_id
+    get_steam_details()
+
+    try:
+        data = fetch_owned_games()
+
+        if not data:
+            print(colourise('No data returned from Steam. Please check the visibility of your user profile.'))
+            steam_api_key = ''
+            steam_user_id = ''
+            return
+
+        total_games = str(data['game_count'])
+
+        if not total_games:
+            print(colourise('You have no games in your library... :('))
+
+        print(colourise('Your have {num} games in your library!'.format(num = total_games)))
+
+        table = LibraryTable(data['game_count'])
+
+        # Resolve games concurrently, results are yielded in library order
+        for result in sync_library_results(data, is_backlog, worker_count, is_sync, is_resume):
+            table.append(result)
+
+            for output in get_printable_record(result.to_record(SOURCE_LIBRARY)):
+                print(colourise(output), flush = True)
+
+        # Output aggregated library data
+        for output in get_printable_totals(table.get_totals()):
+            print(colourise(output))
     except HTTPError as e:
         handle_http_error(e)
 
-    main()
+# Output remaining time left on most recently played Steam game
+def steam_recently_played():
+    global colour_prefix
+    colour_prefix = colours.GREY
+
+    global steam_api_key
+    global steam_user_id
+    get_steam_details()
+
+    try:
+        data = fetch_recent_games()
+
+        if not data:
+            print(colourise('No data returned from Steam. Please check the visibility of your user profile.'))
+            steam_api_key = ''
+            steam_user_id = ''
+            return
+
+        if not data['total_count']:
+            print(colourise('You have not played any games within the last 2 weeks... :('))
+            return
+
+        game_data = data['games'][0]
+        result = get_recent_result(game_data)
+
+        if result.status == GameStatus.ERR_HLTB_NO_DATA:
+            print(colourise('No HLTB data was found for this game.'))
+            return
+
+        record = result.to_record(SOURCE_RECENT, recent_playtime_minutes = game_data['playtime_2weeks'])
+
+        for output in get_printable_record(record):
+            print(colourise(output))
+    except HTTPError as e:
+        handle_http_error(e)
+
+# Output game completion data from search term
+def search_name(game_name: str = ''):
+    global colour_prefix
+    colour_prefix = colours.BLUE
+
+    # Prompt until a search returns a match
+    while True:
+        search_term = input(colourise('Enter game name or search phrase...')).strip().lower()
+
+        result = get_search_result(search_term)
+
+        if result.status == GameStatus.ERR_HLTB_NO_DATA:
+            print(colourise('No matches returned for this query. Try to match the game name.'))
+            continue
+
+        for output in get_printable_record(result.to_record(SOURCE_SEARCH, search_term = search_term)):
+            print(colourise(output))
+
+        return
+
+# Output game completion data from identifier
+def get_by_id(is_steam_id: bool = False):
+    global colour_prefix
+    colour_prefix = colours.MAGENTA
+
+    id_type = 'Steam' if is_steam_id else 'HLTB'
+
+    # Prompt until a valid ID is given
+    while True:
+        game_id = input(colourise('Enter {service} game ID...').format(service = id_type)).strip()
+
+        if not game_id.isdigit():
+            print(colourise('Invalid ID. Must be an integer.'))
+            continue
+
+        # Different lookup service required, HLTB does not natively support Steam app IDs
+        if is_steam_id:
+            result = get_steam_id_result(game_id)
+
+            if result.status == GameStatus.ERR_STEAM_GAME_REMOVED or result.status == GameStatus.ERR_STEAM_TYPE_APP:
+                print(
+                    colourise(
+                        'Unable to find data for this Steam ID, please ensure it is valid/still present on the Steam storefront.'
+                    )
+                )
+                continue
+
+            if result.status == GameStatus.ERR_HLTB_NO_DATA:
+                print(colourise('Unable to find HLTB data for this Steam ID, please ensure it is valid.'))
+                continue
+
+            for output in get_printable_record(result.to_record(SOURCE_STEAM_ID)):
+                print(colourise(output))
+
+            return
+
+        try:
+            result = get_hltb_id_result(int(game_id))
+
+            for output in get_printable_record(result.to_record(SOURCE_HLTB_ID)):
+                print(colourise(output))
+        except HTTPError as e:
+            handle_http_error(e)
+
+        return
 
 # Quit script from user command
 def user_quit():
@@ -739,5 +2907,504 @@ def user_quit():
     print(colourise('Goodbye! 🤙'))
     sys.exit()
 
+# Yield records for command-line arguments
+def get_command_records(args: argparse.Namespace):
+    if args.command == CLI_BACKLOG and args.users:
+        yield from iter_multi_user_records(args.users, args.backlog, args.workers)
+    elif args.command == CLI_BACKLOG:
+        data = fetch_owned_games()
+
+        if not data:
+            print('No data returned from Steam. Please check the visibility of your user profile.', file = sys.stderr)
+            return
+
+        table = LibraryTable(data['game_count'])
+        running_totals = new_library_totals(data['game_count'])
+
+        for result in sync_library_results(data, args.backlog, args.workers, args.sync, args.resume):
+            table.append(result)
+            yield result.to_record(SOURCE_LIBRARY)
+
+            # Running totals are accumulated per game, final totals are aggregated from the table
+            if args.running_totals:
+                add_to_library_totals(running_totals, result)
+                yield running_totals | {'record': RECORD_RUNNING_TOTALS}
+
+        yield table.get_totals()
+    elif args.command == CLI_RECENT:
+        data = fetch_recent_games()
+
+        if not data or not data['total_count']:
+            print('No recently played games returned from Steam.', file = sys.stderr)
+            return
+
+        game_data = data['games'][0]
+        result = get_recent_result(game_data)
+
+        yield result.to_record(SOURCE_RECENT, recent_playtime_minutes = game_data['playtime_2weeks'])
+    elif args.command == CLI_SEARCH:
+        search_term = ' '.join(args.term).strip().lower()
+
+        yield get_search_result(search_term).to_record(SOURCE_SEARCH, search_term = search_term)
+    elif args.command == CLI_ID:
+        source = SOURCE_STEAM_ID if args.steam else SOURCE_HLTB_ID
+
+        for result in iter_id_results(args.game_id, args.steam, args.workers, args.processes):
+            yield result.to_record(source)
+    elif args.command == CLI_QUERY:
+        table = load_query_table(args.backlog, args.workers, args.offline)
+
+        if table is None:
+            return
+
+        field = QUERY_CATEGORIES[args.category]
+        rows = query_library(
+            table,
+            field,
+            min_playtime = args.min_playtime,
+            max_playtime = args.max_playtime,
+            min_remaining = args.min_remaining,
+            max_remaining = args.max_remaining,
+            limit = args.longest if args.longest is not None else args.shortest,
+            is_longest = args.longest is not None,
+        )
+
+        for row in rows:
+            yield table.get_row_record(row, field)
+
+# Parse --processes value, a process count or 'auto' for one per CPU
+# A value is always required, so a following game ID is never taken as the process count
+def parse_process_count(value: str) -> int:
+    if value == PROCESSES_AUTO:
+        return os.cpu_count() or 1
+
+    try:
+        process_count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a number of processes or '{0}', got '{1}'".format(PROCESSES_AUTO, value))
+
+    if process_count < 0:
+        raise argparse.ArgumentTypeError('cannot be negative')
+
+    return process_count
+
+# Build parser for non-interactive command-line usage
+def get_arg_parser(parser_class: type = argparse.ArgumentParser) -> argparse.ArgumentParser:
+    # Shared options are accepted after any subcommand
+    common = parser_class(add_help = False)
+    common.add_argument('--format', choices = OUTPUT_FORMATS, default = OUTPUT_TEXT, help = 'output format')
+    common.add_argument('--refresh', action = 'store_true', help = 'bypass cached lookups')
+    common.add_argument('--no-cache', action = 'store_true', help = 'disable the lookup cache')
+    common.add_argument('--key', default = os.environ.get('STEAM_API_KEY', ''), help = 'Steam API key')
+    common.add_argument('--user', default = os.environ.get('STEAM_USER_ID', ''), help = 'Steam account ID')
+    common.add_argument('--stats', action = 'store_true', help = 'print request timings and counters to stderr')
+    common.add_argument('--stats-json', metavar = 'PATH', help = 'export request timings and counters as JSON')
+
+    parser = parser_class(
+        description = 'Estimate the time required to work through a backlog of video games.',
+    )
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+
+    backlog = subparsers.add_parser(CLI_BACKLOG, parents = [common], help = 'estimates for Steam library')
+    backlog.add_argument('--backlog', action = 'store_true', help = 'only include games with no playtime')
+    backlog.add_argument('--workers', type = int, default = DEFAULT_WORKER_COUNT, help = 'concurrent lookups')
+    backlog.add_argument('--users', nargs = '+', metavar = 'ID', help = 'combine backlogs of many Steam accounts')
+    backlog.add_argument('--sync', action = 'store_true', help = 'only look up games changed since the last scan')
+    backlog.add_argument('--resume', action = 'store_true', help = 'continue an interrupted scan from its last checkpoint')
+    backlog.add_argument('--running-totals', action = 'store_true', help = 'output updated totals after each game')
+
+    subparsers.add_parser(CLI_RECENT, parents = [common], help = 'estimate for most recently played game')
+
+    search = subparsers.add_parser(CLI_SEARCH, parents = [common], help = 'estimate for game by name')
+    search.add_argument('term', nargs = '+', help = 'game name or search phrase')
+
+    game_id = subparsers.add_parser(CLI_ID, parents = [common], help = 'estimates for games by ID')
+    game_id.add_argument('game_id', type = int, nargs = '*', help = 'HLTB (or Steam) game IDs')
+    game_id.add_argument('--steam', action = 'store_true', help = 'IDs are Steam app IDs')
+    game_id.add_argument('--ids-file', metavar = 'PATH', help = 'also read whitespace separated IDs from file, - for stdin')
+    game_id.add_argument('--workers', type = int, default = DEFAULT_WORKER_COUNT, help = 'concurrent lookups')
+    game_id.add_argument(
+        '--processes',
+        type = parse_process_count,
+        default = 0,
+        metavar = 'N',
+        help = 'parse HLTB pages in N processes, {0} for one per CPU (default: 0, parsed in the lookup threads)'.format(PROCESSES_AUTO),
+    )
+
+    query = subparsers.add_parser(CLI_QUERY, parents = [common], help = 'filter and rank Steam library by completion time')
+    query.add_argument('--category', choices = QUERY_CATEGORIES, default = 'main', help = 'completion category to rank by')
+    query.add_argument('--backlog', action = 'store_true', help = 'only include games with no playtime')
+    query.add_argument('--min-playtime', type = float, metavar = 'HOURS', help = 'minimum hours played')
+    query.add_argument('--max-playtime', type = float, metavar = 'HOURS', help = 'maximum hours played')
+    query.add_argument('--min-remaining', type = float, metavar = 'HOURS', help = 'minimum estimated hours left')
+    query.add_argument('--max-remaining', type = float, metavar = 'HOURS', help = 'maximum estimated hours left')
+    query_rank = query.add_mutually_exclusive_group()
+    query_rank.add_argument('--shortest', type = int, metavar = 'N', help = 'only the N games with least time left')
+    query_rank.add_argument('--longest', type = int, metavar = 'N', help = 'only the N games with most time left')
+    query.add_argument('--offline', action = 'store_true', help = 'query the last library scan without contacting Steam')
+    query.add_argument('--workers', type = int, default = DEFAULT_WORKER_COUNT, help = 'concurrent lookups')
+
+    serve = subparsers.add_parser(CLI_SERVE, parents = [common], help = 'serve lookups as JSON over HTTP')
+    serve.add_argument('--host', default = SERVE_DEFAULT_HOST, help = 'address to listen on')
+    serve.add_argument('--port', type = int, default = SERVE_DEFAULT_PORT, help = 'port to listen on')
+
+    warmup = subparsers.add_parser(CLI_WARMUP, parents = [common], help = 'load HLTB entries into the local title index')
+    warmup.add_argument('--file', nargs = '+', metavar = 'PATH', help = 'JSON, NDJSON or CSV dumps of HLTB entries')
+    warmup.add_argument('--crawl', action = 'store_true', help = 'page through every game from the HLTB search API')
+    warmup.add_argument('--pages', type = int, metavar = 'N', help = 'maximum pages to crawl')
+    warmup.add_argument('--page-size', type = int, default = WARMUP_PAGE_SIZE, metavar = 'N', help = 'games per crawled page')
+
+    subparsers.add_parser(
+        CLI_BATCH,
+        parents = [common],
+        help = 'run commands read line by line from stdin, options given here apply to every command',
+    )
+
+    return parser
+
+# Run single command from command-line arguments, returning exit status
+def run_cli(argv: list) -> int:
+    parser = get_arg_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == CLI_BATCH:
+        return run_batch(parser, args)
+
+    if args.command == CLI_SERVE:
+        return run_server(args)
+
+    if args.command == CLI_WARMUP:
+        return run_warmup(parser, args)
+
+    return run_command(parser, args)
+
+# Run parsed command, returning exit status
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    global colour_prefix
+    colour_prefix = colours.GREEN
+
+    use_command_options(args)
+    check_command_args(parser, args)
+
+    reset_metrics()
+    exit_status = 0
+
+    try:
+        with timed_phase('command'):
+            write_records(get_command_records(args), args.format)
+    except HTTPError as e:
+        handle_http_error(e)
+        exit_status = 1
+
+    write_metrics(args)
+
+    return exit_status
+
+# Apply shared command options to global cache and Steam account settings
+def use_command_options(args: argparse.Namespace):
+    global cache_enabled
+    global cache_refresh
+    cache_enabled = not args.no_cache
+    cache_refresh = args.refresh
+
+    global steam_api_key
+    global steam_user_id
+    steam_api_key = args.key
+    steam_user_id = args.user
+
+    # Multiple accounts given with --users replace the single account ID
+    if args.command == CLI_BACKLOG and args.users:
+        steam_user_id = steam_user_id or args.users[0]
+
+# Check command has everything it requires, reporting problems through the parser
+def check_command_args(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    has_user = args.user or (args.command == CLI_BACKLOG and args.users)
+
+    # Offline queries only read the last library scan, so do not need an API key
+    is_offline_query = args.command == CLI_QUERY and args.offline
+
+    if args.command in [CLI_BACKLOG, CLI_RECENT, CLI_QUERY] and not (has_user and (args.key or is_offline_query)):
+        parser.error('a Steam API key and account ID are required (--key/--user or STEAM_API_KEY/STEAM_USER_ID)')
+
+    if args.command == CLI_BACKLOG and args.resume and (args.users or args.no_cache):
+        parser.error('--resume continues a single account scan saved in the cache, so cannot be used with --users or --no-cache')
+
+    # Combined backlogs are always scanned in full and only totalled at the end
+    if args.command == CLI_BACKLOG and args.users and (args.sync or args.running_totals):
+        parser.error('--sync and --running-totals apply to a single account scan, so cannot be used with --users')
+
+    if is_offline_query and args.no_cache:
+        parser.error('--offline queries read the last library scan from the cache, so cannot be used with --no-cache')
+
+    if args.command == CLI_ID:
+        if args.ids_file:
+            try:
+                args.game_id = args.game_id + read_id_file(args.ids_file)
+            except (OSError, ValueError) as e:
+                parser.error('unable to read IDs from {0}: {1}'.format(args.ids_file, e))
+
+        if not args.game_id:
+            parser.error('at least one game ID is required (game_id or --ids-file)')
+
+        if args.processes and args.steam:
+            parser.error('--processes parses HLTB game pages, so cannot be used with --steam')
+
+# Read whitespace separated game IDs from file, - reads from stdin
+def read_id_file(path: str) -> list:
+    if path == '-':
+        return [int(game_id) for game_id in sys.stdin.read().split()]
+
+    with open(path) as id_file:
+        return [int(game_id) for game_id in id_file.read().split()]
+
+# Output metrics for command when requested
+def write_metrics(args: argparse.Namespace):
+    if not args.stats and not args.stats_json:
+        return
+
+    summary = get_metrics_summary()
+
+    if args.stats:
+        print(get_printable_metrics(summary), file = sys.stderr)
+
+    if args.stats_json:
+        with open(args.stats_json, 'w') as stats_file:
+            json.dump(summary, stats_file, indent = 2)
+
+# Run commands read from stdin one line at a time, returning highest exit status
+def run_batch(parser: argparse.ArgumentParser, args: argparse.Namespace, stream = None) -> int:
+    stream = stream or sys.stdin
+
+    # Batch options are inserted before each command's own options, so they act as defaults
+    batch_options = ['--format', args.format, '--key', args.key, '--user', args.user]
+
+    if args.refresh:
+        batch_options.append('--refresh')
+
+    if args.no_cache:
+        batch_options.append('--no-cache')
+
+    exit_status = 0
+
+    for line in stream:
+        line_args = shlex.split(line, comments = True)
+
+        if not line_args:
+            continue
+
+        try:
+            if line_args[0] == CLI_BATCH:
+                parser.error('batch commands cannot be nested')
+
+            if line_args[0] == CLI_SERVE:
+                parser.error('the serve command cannot be run from a batch')
+
+            command_args = parser.parse_args(line_args[:1] + batch_options + line_args[1:])
+
+            if command_args.command == CLI_WARMUP:
+                status = run_warmup(parser, command_args)
+            else:
+                status = run_command(parser, command_args)
+        except SystemExit as e:
+            # Invalid commands are reported by the parser, remaining commands still run
+            status = e.code if type(e.code) == int else 1
+
+        exit_status = max(exit_status, status)
+
+    return exit_status
+
+# Load HLTB entries from dumps and/or a crawl of the search API into the title index, returning exit status
+def run_warmup(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    use_command_options(args)
+
+    if args.no_cache:
+        parser.error('warmup loads entries into the cache, so cannot be used with --no-cache')
+
+    if not args.file and not args.crawl:
+        parser.error('at least one of --file or --crawl is required')
+
+    reset_metrics()
+    exit_status = 0
+
+    with timed_phase('command'):
+        for path in args.file or []:
+            try:
+                entries = load_entry_file(path)
+            except (OSError, ValueError) as e:
+                print('Unable to read HLTB entries from {0}: {1}'.format(path, e), file = sys.stderr)
+                exit_status = 1
+                continue
+
+            entry_count, skipped_count = warm_title_index(entries)
+            print('Loaded {0} HLTB entries from {1}'.format(entry_count, path), file = sys.stderr)
+
+            if skipped_count:
+                print('Skipped {0} entries without a game ID or name in {1}'.format(skipped_count, path), file = sys.stderr)
+
+        if args.crawl:
+            entry_count = 0
+
+            try:
+                for entries in crawl_hltb_entries(args.page_size, args.pages):
+                    entry_count += warm_title_index(entries)[0]
+            except HTTPError as e:
+                handle_http_error(e)
+                exit_status = 1
+
+            print('Loaded {0} HLTB entries from search crawl'.format(entry_count), file = sys.stderr)
+
+    write_metrics(args)
+
+    return exit_status
+
+# Argument parser for service mode requests, errors are raised so they can be returned to the client
+class ServeArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):
+        raise ValueError(message)
+
+# Build request handler class for service mode, answering each endpoint with JSON records
+# The HTTP server module is only imported by the serve command
+def get_serve_request_handler() -> type:
+    from http.server import BaseHTTPRequestHandler
+
+    class ServeRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        # Headers and body are written separately, so small responses would otherwise wait on delayed ACKs
+        disable_nagle_algorithm = True
+
+        # Send data as JSON response
+        def send_json(self, data, status: int = 200):
+            body = json.dumps(data).encode('utf-8')
+
+            self.send_response(status)
+            self.send_header('content-type', 'application/json; charset=utf-8')
+            self.send_header('content-length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            path = url.path.rstrip('/')
+
+            if path == '/stats':
+                self.send_json(get_metrics_summary())
+                return
+
+            argv = get_serve_argv(path, parse_qs(url.query), self.server.command_args)
+
+            if argv is None:
+                self.send_json({'error': 'Unknown endpoint: {0}'.format(path)}, 404)
+                return
+
+            try:
+                args = self.server.command_parser.parse_args(argv)
+                check_command_args(self.server.command_parser, args)
+            except ValueError as e:
+                self.send_json({'error': str(e)}, 400)
+                return
+
+            try:
+                with timed_phase('serve_request'):
+                    records = list(get_command_records(args))
+            except HTTPError as e:
+                self.send_json(
+                    {
+                        'error': 'An error occured making a request to {0}'.format(urlsplit(e.response.url).netloc),
+                        'status': e.response.status_code,
+                        'reason': e.response.reason,
+                    },
+                    502,
+                )
+                return
+            except (RequestConnectionError, Timeout) as e:
+                self.send_json(
+                    {
+                        'error': 'Unable to connect to {0}'.format(urlsplit(e.request.url).netloc if e.request else 'upstream service'),
+                        'reason': type(e).__name__,
+                    },
+                    502,
+                )
+                return
+            except Exception as e:
+                # Clients always get an answer, even for unexpected errors
+                self.log_error('Error answering %s: %r', self.path, e)
+                self.send_json({'error': 'Internal error: {0}'.format(type(e).__name__)}, 500)
+                return
+
+            self.send_json(records)
+
+    return ServeRequestHandler
+
+# Get values of query parameter, list parameters may also be comma separated
+def get_param_values(params: dict, name: str) -> list:
+    values = params.get(name, [])
+
+    if name in SERVE_LIST_PARAMS:
+        values = [value for joined in values for value in joined.split(',') if value]
+
+    return values
+
+# Build command-line arguments for service endpoint from query parameters, None for unknown endpoints
+def get_serve_argv(path: str, params: dict, serve_args: argparse.Namespace) -> list | None:
+    if path not in SERVE_COMMANDS:
+        return None
+
+    # Requests always use the account and cache settings the service was started with
+    argv = SERVE_COMMANDS[path] + ['--format', OUTPUT_JSON, '--key', serve_args.key, '--user', serve_args.user]
+
+    if serve_args.no_cache:
+        argv.append('--no-cache')
+
+    for flag in SERVE_FLAGS.get(path, []):
+        if get_param_values(params, flag)[-1:] in [['1'], ['true'], ['yes']]:
+            argv.append('--' + flag)
+
+    for option in SERVE_OPTIONS.get(path, []):
+        values = get_param_values(params, option)
+        option = '--' + option.replace('_', '-')
+
+        if option == '--users' and values:
+            argv += [option] + values
+        elif values:
+            argv.append('{0}={1}'.format(option, values[-1]))
+
+    # Positional values follow a separator, so they are never read as options
+    if path in SERVE_POSITIONAL:
+        argv += ['--'] + get_param_values(params, SERVE_POSITIONAL[path])
+
+    return argv
+
+# Serve lookups over HTTP until interrupted, connections, caches and the title index stay warm between requests
+def run_server(args: argparse.Namespace) -> int:
+    use_command_options(args)
+    reset_metrics()
+
+    if cache_enabled:
+        load_title_index()
+
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((args.host, args.port), get_serve_request_handler())
+    server.daemon_threads = True
+    server.command_parser = get_arg_parser(ServeArgumentParser)
+    server.command_args = args
+
+    print('Serving lookups at http://{0}:{1}/'.format(*server.server_address[:2]), file = sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    write_metrics(args)
+
+    return 0
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+
+    main()